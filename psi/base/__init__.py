@@ -1,2 +1,3 @@
-from .sender import send
-from .receiver import recv
\ No newline at end of file
+from .sender import send, send_batch
+from .receiver import recv, recv_batch
+from .aio import async_send_batch, async_recv_batch
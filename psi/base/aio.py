@@ -0,0 +1,46 @@
+from concurrent.futures import Executor
+from typing import List, Optional, Sequence, Union
+
+from .receiver import _batch_keys, _batch_decrypt
+from .sender import _batch_key, _batch_ciphers
+from ..pair import AsyncPair
+from ..utils import run_in_executor
+
+__all__ = ["async_send_batch", "async_recv_batch"]
+
+
+async def async_send_batch(
+    pair: AsyncPair,
+    m0s: Sequence[bytes],
+    m1s: Sequence[bytes],
+    curve: str = "secp256r1",
+    executor: Optional[Executor] = None,
+):
+    """
+    coroutine version of send_batch, elliptic curve operations run in the executor
+
+    :param executor: executor of the curve operations, the default executor of the running loop if it is None
+    """
+    if len(m0s) != len(m1s):
+        raise ValueError(f"m0 count {len(m0s)} is not equal to m1 count {len(m1s)}")
+    sk, msg = await run_in_executor(executor, _batch_key, curve)
+    await pair.send(msg)
+    msg = await pair.recv()
+    await pair.send(await run_in_executor(executor, _batch_ciphers, sk, curve, msg, m0s, m1s))
+
+
+async def async_recv_batch(
+    pair: AsyncPair,
+    bs: Sequence[Union[int, bool]],
+    curve: str = "secp256r1",
+    executor: Optional[Executor] = None,
+) -> List[bytes]:
+    """
+    coroutine version of recv_batch, elliptic curve operations run in the executor
+    """
+    assert all(b == 0 or b == 1 for b in bs), "b should be 0 or 1"
+
+    ak, sks, msg = await run_in_executor(executor, _batch_keys, await pair.recv(), bs, curve)
+    await pair.send(msg)
+    msg = await pair.recv()
+    return await run_in_executor(executor, _batch_decrypt, ak, sks, bs, msg)
@@ -1,17 +1,21 @@
+from typing import List, Sequence, Tuple, Union
+
 from Crypto.PublicKey import ECC
 
 from ..cipher import shake
 from ..pair import Pair
-from ..serialize import bytes_to_key, point_to_bytes, key_to_bytes
-from ..utils import unpack
+from ..serialize import (
+    bytes_to_key, point_to_bytes, key_to_bytes, int_to_bytes, point_to_raw_bytes, raw_bytes_to_point, curve_name
+)
+from ..utils import unpack, unpack_many, pack_list
 
 
-def recv(pair: Pair, b: int) -> bytes:
+def recv(pair: Pair, b: int, curve: str = "secp256r1") -> bytes:
     assert b == 0 or b == 1, "b should be 0 or 1"
 
     ak_bytes = pair.recv()
     ak = bytes_to_key(ak_bytes)
-    curve = ak.curve
+    _check_curve(ak.curve, curve)
 
     sk = ECC.generate(curve=curve)
     pk = sk.public_key()
@@ -29,3 +33,63 @@ def recv(pair: Pair, b: int) -> bytes:
 
     res = shake.decrypt(point_to_bytes(ck), cipher_m)
     return res
+
+
+def recv_batch(pair: Pair, bs: Sequence[Union[int, bool]], curve: str = "secp256r1") -> List[bytes]:
+    """
+    receive len(bs) OTs in one round trip, the peer should call send_batch with the same OT count and curve
+    """
+    assert all(b == 0 or b == 1 for b in bs), "b should be 0 or 1"
+
+    ak, sks, msg = _batch_keys(pair.recv(), bs, curve)
+    pair.send(msg)
+    return _batch_decrypt(ak, sks, bs, pair.recv())
+
+
+def _check_curve(peer_curve: str, curve: str):
+    """
+    the sender chooses the curve, it is only accepted if it is the curve of the receiver
+    """
+    if curve_name(peer_curve) != curve_name(curve):
+        raise ValueError(f"sender curve {peer_curve} is not the receiver curve {curve}")
+
+
+def _batch_keys(
+    msg: bytes, bs: Sequence[Union[int, bool]], curve: str
+) -> Tuple[ECC.EccPoint, List[ECC.EccKey], bytes]:
+    """
+    :param msg: the first message of the sender with the curve and the sender public key
+    :param curve: curve of the receiver, the sender curve should be the same
+    :return: sender public key, receiver keys, and the receiver keys message
+    """
+    curve_bytes, ak_bytes = unpack(msg)
+    _check_curve(curve_bytes.decode("utf-8"), curve)
+    ak = raw_bytes_to_point(ak_bytes, curve)
+
+    sks = []
+    pks = []
+    for b in bs:
+        sk = ECC.generate(curve=curve)
+        # choose point
+        point = sk.pointQ
+        if b == 1:
+            point = point + ak
+        sks.append(sk)
+        pks.append(point)
+    # all chosen points are sent in one message
+    return ak, sks, pack_list([point_to_raw_bytes(pk, curve) for pk in pks])
+
+
+def _batch_decrypt(
+    ak: ECC.EccPoint, sks: List[ECC.EccKey], bs: Sequence[Union[int, bool]], msg: bytes
+) -> List[bytes]:
+    """
+    :param msg: the last message of the sender with the encrypted m0s and m1s
+    """
+    keys = [int_to_bytes(i) + point_to_bytes(ak * sk.d) for i, sk in enumerate(sks)]
+    cipher_m0s, cipher_m1s = unpack_many(msg)
+    if len(cipher_m0s) != len(bs):
+        raise ValueError(f"expect {len(bs)} messages, but received {len(cipher_m0s)}")
+    cipher_ms = [(m0, m1)[b] for b, m0, m1 in zip(bs, cipher_m0s, cipher_m1s)]
+
+    return shake.decrypt_many(keys, cipher_ms)
@@ -1,9 +1,11 @@
+from typing import Sequence, Tuple
+
 from Crypto.PublicKey import ECC
 
 from ..cipher import shake
 from ..pair import Pair
-from ..serialize import key_to_bytes, bytes_to_key, point_to_bytes
-from ..utils import pack
+from ..serialize import key_to_bytes, bytes_to_key, point_to_bytes, int_to_bytes, point_to_raw_bytes, raw_bytes_to_point
+from ..utils import pack, pack_many, unpack_list
 
 
 def send(pair: Pair, m0: bytes, m1: bytes, curve: str = "secp256r1"):
@@ -23,3 +25,90 @@ def send(pair: Pair, m0: bytes, m1: bytes, curve: str = "secp256r1"):
     cipher_m0 = shake.encrypt(point_to_bytes(ck0), m0)
     cipher_m1 = shake.encrypt(point_to_bytes(ck1), m1)
     pair.send(pack(cipher_m0, cipher_m1))
+
+
+def send_batch(pair: Pair, m0s: Sequence[bytes], m1s: Sequence[bytes], curve: str = "secp256r1"):
+    """
+    run len(m0s) OTs in one round trip, one sender key pair is shared by all OTs,
+    so the OT index is mixed into the cipher keys
+    """
+    if len(m0s) != len(m1s):
+        raise ValueError(f"m0 count {len(m0s)} is not equal to m1 count {len(m1s)}")
+    sk, msg = _batch_key(curve)
+    pair.send(msg)
+    pair.send(_batch_ciphers(sk, curve, pair.recv(), m0s, m1s))
+
+
+def _batch_key(curve: str) -> Tuple[ECC.EccKey, bytes]:
+    """
+    :return: sender key shared by all OTs of a batch, and the first message with the curve and the public key
+    """
+    sk = ECC.generate(curve=curve)
+    return sk, pack(curve.encode("utf-8"), point_to_raw_bytes(sk.pointQ, curve))
+
+
+def _batch_ciphers(sk: ECC.EccKey, curve: str, msg: bytes, m0s: Sequence[bytes], m1s: Sequence[bytes]) -> bytes:
+    """
+    :param msg: receiver keys message
+    :return: the last message with the encrypted m0s and m1s
+    """
+    bks = [raw_bytes_to_point(bk_bytes, curve) for bk_bytes in unpack_list(msg)]
+    if len(bks) != len(m0s):
+        raise ValueError(f"expect {len(m0s)} receiver keys, but received {len(bks)}")
+
+    # cipher keys for m0 and m1, (bk - pk) * d = bk * d - pk * d, and pk * d is computed only once
+    neg_pk_d = -(sk.pointQ * sk.d)
+    keys0, keys1 = [], []
+    for i, bk in enumerate(bks):
+        ck0 = bk * sk.d
+        ck1 = ck0 + neg_pk_d
+        keys0.append(int_to_bytes(i) + point_to_bytes(ck0))
+        keys1.append(int_to_bytes(i) + point_to_bytes(ck1))
+
+    return pack_many(shake.encrypt_many(keys0, m0s), shake.encrypt_many(keys1, m1s))
+
+
+if __name__ == '__main__':
+    import threading
+    import time
+
+    from .receiver import recv, recv_batch
+    from ..pair import make_pair
+
+    count = 128
+    m0s = [bytes(1024) for _ in range(count)]
+    m1s = [bytes(1024) for _ in range(count)]
+    choices = [i % 2 for i in range(count)]
+
+    def run(curve: str, batch: bool, port: int):
+        def run_receiver():
+            with make_pair(("127.0.0.1", port + 1), ("127.0.0.1", port)) as receiver_pair:
+                if batch:
+                    recv_batch(receiver_pair, choices, curve)
+                else:
+                    for b in choices:
+                        recv(receiver_pair, b, curve)
+
+        receiver_thread = threading.Thread(target=run_receiver)
+        receiver_thread.start()
+        with make_pair(("127.0.0.1", port), ("127.0.0.1", port + 1)) as sender_pair:
+            start = time.time()
+            if batch:
+                send_batch(sender_pair, m0s, m1s, curve)
+            else:
+                for m0, m1 in zip(m0s, m1s):
+                    send(sender_pair, m0, m1, curve)
+            cost = time.time() - start
+        receiver_thread.join()
+        return cost
+
+    port = 12300
+    print(f"{count} OTs, secp256r1, one by one with DER keys: {run('secp256r1', False, port):.3f}s")
+    for curve in ["secp256r1", "secp384r1", "secp521r1", "ed25519", "ed448"]:
+        port += 2
+        try:
+            ECC.generate(curve=curve)
+        except (KeyError, ValueError):
+            print(f"{curve} is not supported by the installed pycryptodome")
+            continue
+        print(f"{count} OTs, {curve}, batched with raw points: {run(curve, True, port):.3f}s")
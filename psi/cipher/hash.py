@@ -0,0 +1,29 @@
+import hashlib
+from typing import Sequence
+
+import numpy as np
+
+__all__ = ["shake_rows", "sha256_rows"]
+
+
+def shake_rows(data: Sequence[bytes], length: int) -> np.ndarray:
+    """
+    :param data: sequence of bytes to hash
+    :param length: output length of SHAKE256 for each element in data
+    :return: 2-d uint8 array, shape: len(data) * length, row i is SHAKE256(data[i]) of given length
+    """
+    buffer = b"".join(hashlib.shake_256(item).digest(length) for item in data)
+    return np.frombuffer(buffer, dtype=np.uint8).reshape((len(data), length))
+
+
+def sha256_rows(arr: np.ndarray) -> np.ndarray:
+    """
+    :param arr: 2-d uint8 array
+    :return: 2-d uint8 array, shape: rows * 32, row i is SHA256 digest of arr[i, :]
+    """
+    rows, width = arr.shape
+    view = memoryview(np.ascontiguousarray(arr).reshape(-1))
+    buffer = b"".join(
+        hashlib.sha256(view[i * width: (i + 1) * width]).digest() for i in range(rows)
+    )
+    return np.frombuffer(buffer, dtype=np.uint8).reshape((rows, 32))
@@ -1,3 +1,7 @@
+import hashlib
+from typing import List, Sequence
+
+import numpy as np
 from Crypto.Hash import SHAKE256
 
 
@@ -21,3 +25,30 @@ def decrypt(secret: bytes, ciphertext: bytes):
 
     int_pt = int_key ^ int_ct
     return int_pt.to_bytes(len(ciphertext), "big")
+
+
+def _xor_many(secrets: Sequence[bytes], data: Sequence[bytes]) -> List[bytes]:
+    lengths = [len(item) for item in data]
+    key = b"".join(hashlib.shake_256(secret).digest(n) for secret, n in zip(secrets, lengths))
+    buffer = (np.frombuffer(key, dtype=np.uint8) ^ np.frombuffer(b"".join(data), dtype=np.uint8)).tobytes()
+
+    res = []
+    offset = 0
+    for n in lengths:
+        res.append(buffer[offset: offset + n])
+        offset += n
+    return res
+
+
+def encrypt_many(secrets: Sequence[bytes], plaintexts: Sequence[bytes]) -> List[bytes]:
+    """
+    same as calling encrypt(secrets[i], plaintexts[i]) for each i, but xor all pads in one pass
+    """
+    return _xor_many(secrets, plaintexts)
+
+
+def decrypt_many(secrets: Sequence[bytes], ciphertexts: Sequence[bytes]) -> List[bytes]:
+    """
+    same as calling decrypt(secrets[i], ciphertexts[i]) for each i, but xor all pads in one pass
+    """
+    return _xor_many(secrets, ciphertexts)
@@ -1,7 +1,10 @@
 from psi import config
-from psi.pair import make_pair, Address
-from psi.psi import Client
+from psi.loader import load_input
+from psi.pair import make_pair, make_pairs, Address
+from psi.psi import Client, BucketClient, ShardedClient
+from psi.writer import ResultWriter
 import logging
+from contextlib import ExitStack
 
 
 def start_client(address: str):
@@ -11,24 +14,56 @@ def start_client(address: str):
     local_address = Address(config.host, config.port)
     peer_address = Address(peer_host, peer_port)
 
-    with open(config.data, mode="r", encoding="utf-8") as f:
-        data = [val.rstrip().encode("utf-8") for val in f]
+    party_input = load_input(
+        config.data,
+        data_format=config.data_format,
+        dedup=config.dedup,
+        trim=config.trim,
+        case=config.case,
+        id_width=config.id_width,
+        result_format=config.result_format,
+        bucketed=config.bucket_memory is not None,
+        shards=config.shards,
+    )
 
-    with make_pair(local_address, peer_address) as pair:
-        client = Client(pair, data)
+    options = dict(
+        curve=config.curve,
+        stat_security=config.stat_security,
+        output_length=config.output_length,
+        pipeline=config.pipeline,
+    )  # psi client parameters
+    with ExitStack() as stack:
+        if config.shards > 1:
+            # shards are channels of one connection
+            pairs = [stack.enter_context(pair) for pair in make_pairs(local_address, peer_address, config.shards)]
+        else:
+            pairs = [stack.enter_context(make_pair(local_address, peer_address))]
+        pair = pairs[0]
+
+        if config.bucket_memory is not None:
+            # items are parsed chunk by chunk and partitioned into buckets on disk in prepare stage
+            client = BucketClient(pair, party_input.chunks, config.bucket_memory, config.bucket_dir, **options)
+        elif config.shards > 1:
+            client = ShardedClient(pairs, party_input.items, **options)
+        else:
+            client = Client(pair, party_input.items, **options)
 
         logging.info("start prepare")
         client.prepare()  # prepare stage
         logging.info("finish prepare")
 
         logging.info("start intersection")
-        res = client.intersect()  # intersect stage, res is the intersection
+        # intersect stage, items in the intersection are written to the result as soon as they are found
+        with ResultWriter(
+            config.result,
+            output_format=config.result_format,
+            sort=config.sort_result,
+            data_format=config.data_format,
+            id_width=config.id_width,
+            rows=party_input.rows,
+        ) as writer:
+            for item in client.iter_intersect():
+                writer.write(item)
         logging.info("finish intersection")
 
-        res_strs = sorted([val.decode("utf-8") for val in res])
-        with open(config.result, mode="w", encoding="utf-8") as f:
-            for line in res_strs:
-                f.write(line)
-                f.write("\n")
-
         pair.barrier()
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 
 import yaml
 
@@ -11,3 +12,41 @@ host: str = _c.get("host")
 port: int = _c.get("port")
 data: str = _c.get("data")
 result: str = _c.get("result")
+curve: str = _c.get("curve", "secp256r1")
+stat_security: int = _c.get("stat_security", 40)
+# oprf output length in bytes, the minimum safe length is used if it is not set
+output_length: Optional[int] = _c.get("output_length")
+if output_length is not None and not 0 < output_length <= 32:
+    raise ValueError(f"output_length {output_length} should be in range (0, 32]")
+# send the server oprf values as a compact filter, "bloom" or "gcs", plain arrays are sent if it is not set.
+# a filter takes about log2(1 / fp_rate) + 2 bits ("gcs") or 1.44 * log2(1 / fp_rate) bits ("bloom") of each value,
+# with the default fp_rate only "gcs" is smaller than the arrays, filters save more with a larger fp_rate
+filter_type: Optional[str] = _c.get("filter_type")
+# false positive rate of one filter lookup, 2^-stat_security for the whole intersection if it is not set.
+# a false positive is a client item out of the intersection, which the client reports to the server as a match
+fp_rate: Optional[float] = _c.get("fp_rate")
+# server oprf evaluation processes, it should be 1 if shards is greater than 1
+workers: int = _c.get("workers", 1)
+# overlap oprf evaluation, transmission and matching of the intersection stage
+pipeline: bool = _c.get("pipeline", False)
+# input file format, "text" (one item per line) or "binary" (fixed width records, see psi.loader.save_binary)
+data_format: str = _c.get("data_format", "text")
+# drop repeated input items
+dedup: bool = _c.get("dedup", True)
+# strip whitespaces of text lines in the "right", "both" or "none" side
+trim: str = _c.get("trim", "right")
+# convert text lines to "lower" or "upper" case, lines are not converted if it is not set
+case: Optional[str] = _c.get("case")
+# parse text lines as decimal integers encoded as id_width bytes, lines are used as they are if it is not set
+id_width: Optional[int] = _c.get("id_width")
+# result file format, "text" (one item per line), "binary" (fixed width records) or "index" (input row of every item)
+result_format: str = _c.get("result_format", "text")
+# sort the result, it is sorted in bounded memory runs merged from temporary files
+sort_result: bool = _c.get("sort_result", True)
+# peak memory of the psi in bytes, the inputs are partitioned into buckets on disk to fit in it if it is set
+# at most 1024 buckets of about 1KB per item are used, so it should be at least the item count in bytes
+bucket_memory: Optional[int] = _c.get("bucket_memory")
+# parent directory of the bucket files, the system temporary directory if it is not set
+bucket_dir: Optional[str] = _c.get("bucket_dir")
+# psi shards run concurrently over channels of one connection, both parties should use the same count
+shards: int = _c.get("shards", 1)
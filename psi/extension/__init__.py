@@ -1,2 +1,3 @@
 from .receiver import Receiver
 from .sender import Sender
+from .aio import AsyncSender, AsyncReceiver
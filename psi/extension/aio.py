@@ -0,0 +1,80 @@
+from concurrent.futures import Executor
+from typing import List, Optional, Sequence, Union
+
+from .receiver import Receiver
+from .sender import Sender
+from ..base import async_send_batch, async_recv_batch
+from ..pair import AsyncPair
+from ..utils import run_in_executor
+
+__all__ = ["AsyncSender", "AsyncReceiver"]
+
+
+class AsyncSender(Sender):
+    """
+    coroutine version of Sender, matrix and cipher operations run in the executor
+    """
+
+    def __init__(
+        self, pair: AsyncPair, codewords: int = 128, curve: str = "secp256r1", executor: Optional[Executor] = None
+    ):
+        """
+        :param executor: executor of the cpu heavy operations, the default executor of the running loop if it is None
+        """
+        super(AsyncSender, self).__init__(pair, codewords, curve)
+        self._executor = executor
+
+    async def prepare(self):
+        self._choose_s()
+        if self._codewords == 128:
+            q_cols = await async_recv_batch(self._pair, self._s.tolist(), self._curve, self._executor)
+        else:
+            receiver = AsyncReceiver(self._pair, self._s, 128, self._curve, self._executor)
+            await receiver.prepare()
+            q_cols = await receiver.recv_many(self._s.size)
+        await self._pair.barrier()
+        await run_in_executor(self._executor, self._load_q, q_cols)
+
+    async def send(self, m0: bytes, m1: bytes):
+        await self._pair.send(self._cipher(m0, m1))
+
+    async def send_many(self, m0s: Sequence[bytes], m1s: Sequence[bytes]):
+        await self._pair.send(await run_in_executor(self._executor, self._cipher_many, m0s, m1s))
+
+
+class AsyncReceiver(Receiver):
+    """
+    coroutine version of Receiver, matrix and cipher operations run in the executor
+    """
+
+    def __init__(
+        self,
+        pair: AsyncPair,
+        r: Sequence[Union[int, bool]],
+        codewords: int = 128,
+        curve: str = "secp256r1",
+        executor: Optional[Executor] = None,
+    ):
+        """
+        :param executor: executor of the cpu heavy operations, the default executor of the running loop if it is None
+        """
+        super(AsyncReceiver, self).__init__(pair, r, codewords, curve)
+        self._executor = executor
+
+    async def prepare(self):
+        t_cols_bytes, u_cols_bytes = await run_in_executor(self._executor, self._base_messages)
+        if self._codewords == 128:
+            await async_send_batch(self._pair, t_cols_bytes, u_cols_bytes, self._curve, self._executor)
+        else:
+            sender = AsyncSender(self._pair, 128, self._curve, self._executor)
+            await sender.prepare()
+            await sender.send_many(t_cols_bytes, u_cols_bytes)
+        await self._pair.barrier()
+
+    async def recv(self) -> bytes:
+        return self._decrypt(await self._pair.recv())
+
+    async def recv_many(self, count: int) -> List[bytes]:
+        self._check_count(count)
+        msg = await self._pair.recv()
+        return await run_in_executor(self._executor, self._decrypt_many, count, msg)
@@ -1,22 +1,23 @@
-from typing import Union, Sequence
+from typing import List, Tuple, Union, Sequence
 
 import numpy as np
 
 from .. import base
 from ..cipher import shake
 from ..pair import Pair
-from ..serialize import bit_arr_to_bytes, int_to_bytes
-from ..utils import unpack, rand_binary_arr
+from ..serialize import int_to_bytes
+from ..utils import unpack, unpack_many, BitMatrix
 
 
 class Receiver(object):
     _pair: Pair
     _r: np.ndarray  # 1-d uint8 array of 0 and 1, select bits for m OTs, length is m
-    _t: np.ndarray  # OT extension matrix, shape: m * k
+    _t: BitMatrix  # OT extension matrix, shape: m * k
     _index: int = 0
     _codewords: int  # codewords length, matrix q's width, should be greater equal than 128 (for security)
+    _curve: str  # elliptic curve used by base OT
 
-    def __init__(self, pair: Pair, r: Sequence[Union[int, bool]], codewords: int = 128):
+    def __init__(self, pair: Pair, r: Sequence[Union[int, bool]], codewords: int = 128, curve: str = "secp256r1"):
         self._pair = pair
         self._r = np.array(r, dtype=np.uint8)
         if codewords < 128:
@@ -25,29 +26,38 @@ class Receiver(object):
                 f" it should be greater equal than 128 to ensure security"
             )
         self._codewords = codewords
+        self._curve = curve
 
     def prepare(self):
-        m = self._r.size
-        self._t = rand_binary_arr((m, self._codewords))
-
-        # col(u) = col(t) xor r
-        u = (self._t.T ^ self._r).T
+        t_cols_bytes, u_cols_bytes = self._base_messages()
         if self._codewords == 128:
-            for i in range(self._codewords):
-                t_col_bytes = bit_arr_to_bytes(self._t[:, i])
-                u_col_bytes = bit_arr_to_bytes(u[:, i])
-                base.send(self._pair, t_col_bytes, u_col_bytes)
+            base.send_batch(self._pair, t_cols_bytes, u_cols_bytes, self._curve)
         else:
             from psi.extension import Sender
 
-            sender = Sender(self._pair, 128)
+            sender = Sender(self._pair, 128, self._curve)
             sender.prepare()
-            for i in range(self._codewords):
-                t_col_bytes = bit_arr_to_bytes(self._t[:, i])
-                u_col_bytes = bit_arr_to_bytes(u[:, i])
-                sender.send(t_col_bytes, u_col_bytes)
+            sender.send_many(t_cols_bytes, u_cols_bytes)
         self._pair.barrier()
 
+    def _base_messages(self) -> Tuple[List[bytes], List[bytes]]:
+        """
+        choose t, and make the base ot messages, the columns of t and u
+
+        :return: m0s and m1s of base ots
+        """
+        m = self._r.size
+        self._t = BitMatrix.rand(m, self._codewords)
+
+        # col(u) = col(t) xor r
+        u = self._t ^ BitMatrix.repeat(self._r, self._codewords)
+        t_cols = self._t.T
+        u_cols = u.T
+        m_bytes = int_to_bytes(m)
+        t_cols_bytes = [m_bytes + t_cols.row_bytes(i) for i in range(self._codewords)]
+        u_cols_bytes = [m_bytes + u_cols.row_bytes(i) for i in range(self._codewords)]
+        return t_cols_bytes, u_cols_bytes
+
     def is_available(self):
         return self._t is not None and self._index < self._r.size
 
@@ -58,9 +68,45 @@ class Receiver(object):
         return self._r.shape[0]
 
     def recv(self):
-        key = int_to_bytes(self._index) + bit_arr_to_bytes(self._t[self._index, :])
+        return self._decrypt(self._pair.recv())
 
-        cipher_m = unpack(self._pair.recv())[self._r[self._index]]
+    def recv_many(self, count: int) -> List[bytes]:
+        """
+        same as calling recv() count times, the sender should call send_many with count message pairs
+        """
+        self._check_count(count)
+        return self._decrypt_many(count, self._pair.recv())
+
+    def _decrypt(self, msg: bytes) -> bytes:
+        """
+        :param msg: message of the sender's send
+        """
+        key = self._keys(self._index, self._index + 1)[0]
+
+        cipher_m = unpack(msg)[self._r[self._index]]
         res = shake.decrypt(key, cipher_m)
         self._index += 1
         return res
+
+    def _check_count(self, count: int):
+        if self._index + count > self._r.size:
+            raise ValueError(f"only {self._r.size - self._index} ot keys remain, but {count} are required")
+
+    def _decrypt_many(self, count: int, msg: bytes) -> List[bytes]:
+        """
+        :param msg: message of the sender's send_many
+        """
+        cipher_m0s, cipher_m1s = unpack_many(msg)
+        if len(cipher_m0s) != count:
+            raise ValueError(f"expect {count} messages, but received {len(cipher_m0s)}")
+        r = self._r[self._index: self._index + count].tolist()
+        cipher_ms = [pair[b] for b, pair in zip(r, zip(cipher_m0s, cipher_m1s))]
+
+        res = shake.decrypt_many(self._keys(self._index, self._index + count), cipher_ms)
+        self._index += count
+        return res
+
+    def _keys(self, start: int, stop: int) -> List[bytes]:
+        codewords_bytes = int_to_bytes(self._codewords)
+        t = self._t[start:stop]
+        return [int_to_bytes(start + i) + codewords_bytes + t.row_bytes(i) for i in range(stop - start)]
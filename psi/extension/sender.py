@@ -1,22 +1,24 @@
-from typing import Optional
+from typing import List, Optional, Sequence, Tuple
 
 import numpy as np
 
 from .. import base
 from ..cipher import shake
 from ..pair import Pair
-from ..serialize import bit_arr_to_bytes, bytes_to_bit_arr, int_to_bytes
-from ..utils import pack, rand_binary_arr
+from ..serialize import bytes_to_packed_bit_arr, int_to_bytes
+from ..utils import pack, pack_many, rand_binary_arr, BitMatrix
 
 
 class Sender(object):
     _pair: Pair
     _s: np.ndarray
-    _q: Optional[np.ndarray]
+    _s_mask: BitMatrix  # s packed as a matrix with one row
+    _q: Optional[BitMatrix]
     _index: int = 0
     _codewords: int  # codewords length, matrix q's width, should be greater equal than 128 (for security)
+    _curve: str  # elliptic curve used by base OT
 
-    def __init__(self, pair: Pair, codewords: int = 128):
+    def __init__(self, pair: Pair, codewords: int = 128, curve: str = "secp256r1"):
         self._pair = pair
         if codewords < 128:
             raise ValueError(
@@ -24,71 +26,103 @@ class Sender(object):
                 f" it should be greater equal than 128 to ensure security"
             )
         self._codewords = codewords
+        self._curve = curve
 
     def prepare(self):
-        # s (select bits for prepare stage)
-        self._s = rand_binary_arr(self._codewords)
-        # q (keys)
-        self._q = None
-        m = 0
-        q_cols = []
-
+        self._choose_s()
         if self._codewords == 128:
-            # q (keys)
-            for i, b in enumerate(self._s):
-                q_col = base.recv(self._pair, b)  # column of q, bytes of 0,1 arr
-                if m == 0:
-                    m = len(q_col)
-                else:
-                    assert m == len(
-                        q_col
-                    ), f"base OT message length should be all the same, but the round {i} is not"
-                q_cols.append(q_col)
-
+            # q (keys), columns of q, bytes of 0,1 arr
+            q_cols = base.recv_batch(self._pair, self._s.tolist(), self._curve)
         else:
             # use ote instead of ot
             from psi.extension import Receiver
 
-            receiver = Receiver(self._pair, self._s, 128)
+            receiver = Receiver(self._pair, self._s, 128, self._curve)
             receiver.prepare()
-
-            for i in range(self._s.size):
-                q_col = receiver.recv()
-                if m == 0:
-                    m = len(q_col)
-                else:
-                    assert m == len(
-                        q_col
-                    ), f"base OT message length should be all the same, but the round {i} is not"
-                q_cols.append(q_col)
+            q_cols = receiver.recv_many(self._s.size)
         self._pair.barrier()
+        self._load_q(q_cols)
+
+    def _choose_s(self):
+        # s (select bits for prepare stage)
+        self._s = rand_binary_arr(self._codewords)
+        self._s_mask = BitMatrix.from_bit_arr(self._s)
+        # q (keys)
+        self._q = None
 
-        self._q = np.vstack([bytes_to_bit_arr(col) for col in q_cols]).T
+    def _load_q(self, q_cols: List[bytes]):
+        for i, q_col in enumerate(q_cols):
+            assert len(q_col) == len(
+                q_cols[0]
+            ), f"base OT message length should be all the same, but the round {i} is not"
+        cols = [bytes_to_packed_bit_arr(col) for col in q_cols]
+        self._q = BitMatrix.from_bytes([col for _, col in cols], cols[0][0]).T
 
     @property
     def max_count(self) -> int:
         if self._q is None:
             return 0
         else:
-            return self._q.shape[0]
+            return self._q.rows
 
     def is_available(self) -> bool:
-        return self._q is not None and self._index < self._q.shape[0]
+        return self._q is not None and self._index < self._q.rows
 
     def send(self, m0: bytes, m1: bytes):
+        self._pair.send(self._cipher(m0, m1))
+
+    def send_many(self, m0s: Sequence[bytes], m1s: Sequence[bytes]):
+        """
+        same as calling send(m0s[i], m1s[i]) for each i, but all ciphertexts are sent in one message
+        """
+        self._pair.send(self._cipher_many(m0s, m1s))
+
+    def _cipher(self, m0: bytes, m1: bytes) -> bytes:
+        """
+        encrypt m0 and m1 with the keys of the next ot
+
+        :return: message of send
+        """
         if not self.is_available():
             raise ValueError(
                 "The sender is not available now. "
                 "The sender may be not prepared or have used all ot keys"
             )
 
-        key0 = int_to_bytes(self._index) + bit_arr_to_bytes(self._q[self._index, :])
-        key1 = int_to_bytes(self._index) + bit_arr_to_bytes(
-            self._q[self._index, :] ^ self._s
-        )
-
-        cipher_m0 = shake.encrypt(key0, m0)
-        cipher_m1 = shake.encrypt(key1, m1)
+        keys0, keys1 = self._keys(self._index, self._index + 1)
 
-        self._pair.send(pack(cipher_m0, cipher_m1))
+        cipher_m0 = shake.encrypt(keys0[0], m0)
+        cipher_m1 = shake.encrypt(keys1[0], m1)
         self._index += 1
+        return pack(cipher_m0, cipher_m1)
+
+    def _cipher_many(self, m0s: Sequence[bytes], m1s: Sequence[bytes]) -> bytes:
+        """
+        encrypt m0s and m1s with the keys of the next len(m0s) ots
+
+        :return: message of send_many
+        """
+        if len(m0s) != len(m1s):
+            raise ValueError(f"m0 count {len(m0s)} is not equal to m1 count {len(m1s)}")
+        if self._q is None or self._index + len(m0s) > self._q.rows:
+            raise ValueError(
+                "The sender is not available now. "
+                "The sender may be not prepared or have not enough ot keys"
+            )
+
+        keys0, keys1 = self._keys(self._index, self._index + len(m0s))
+        cipher_m0s = shake.encrypt_many(keys0, m0s)
+        cipher_m1s = shake.encrypt_many(keys1, m1s)
+        self._index += len(m0s)
+        return pack_many(cipher_m0s, cipher_m1s)
+
+    def _keys(self, start: int, stop: int) -> Tuple[List[bytes], List[bytes]]:
+        """
+        :return: keys for m0 and keys for m1 of ot in [start, stop)
+        """
+        codewords_bytes = int_to_bytes(self._codewords)
+        q0 = self._q[start:stop]
+        q1 = q0 ^ self._s_mask
+        keys0 = [int_to_bytes(start + i) + codewords_bytes + q0.row_bytes(i) for i in range(stop - start)]
+        keys1 = [int_to_bytes(start + i) + codewords_bytes + q1.row_bytes(i) for i in range(stop - start)]
+        return keys0, keys1
@@ -0,0 +1,207 @@
+import mmap
+import os
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from .utils import binary_magic
+
+__all__ = ["load", "load_rows", "iter_items", "save_binary", "item_to_str", "PartyInput", "load_input"]
+
+_chunk_size = 1 << 24  # bytes parsed at once
+
+
+def _mapped_chunks(path: str, offset: int = 0, align: int = 0) -> Iterator[bytes]:
+    """
+    map the file and yield consecutive chunks of about _chunk_size bytes starting from offset,
+    chunks end after a newline if align is 0, otherwise their length is a multiple of align
+    """
+    with open(path, mode="rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= offset:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = offset
+            while start < size:
+                stop = min(start + _chunk_size, size)
+                if stop < size:
+                    if align > 0:
+                        stop = start + max((stop - start) // align, 1) * align
+                    else:
+                        newline = mm.rfind(b"\n", start, stop)
+                        stop = newline + 1 if newline >= 0 else (mm.find(b"\n", stop) + 1 or size)
+                yield mm[start:stop]
+                start = stop
+
+
+def _text_items(
+    path: str, trim: str = "right", case: Optional[str] = None, id_width: Optional[int] = None
+) -> Iterator[List[bytes]]:
+    if trim not in ("right", "both", "none"):
+        raise ValueError(f"unknown trim mode {trim}, it should be right, both or none")
+    if case not in (None, "lower", "upper"):
+        raise ValueError(f"unknown case mode {case}, it should be lower or upper")
+    for chunk in _mapped_chunks(path):
+        if case == "lower":
+            chunk = chunk.lower()
+        elif case == "upper":
+            chunk = chunk.upper()
+        items = chunk.split(b"\n")
+        if items[-1] == b"":
+            items.pop()
+        if trim == "right":
+            items = [item.rstrip() for item in items]
+        elif trim == "both":
+            items = [item.strip() for item in items]
+        if id_width is not None:
+            items = [int(item).to_bytes(id_width, "big") for item in items]
+        yield items
+
+
+def _binary_items(path: str) -> Iterator[List[bytes]]:
+    with open(path, mode="rb") as f:
+        header = f.read(8)
+        size = os.fstat(f.fileno()).st_size
+    if len(header) != 8 or header[:4] != binary_magic:
+        raise ValueError(f"{path} is not a binary input file")
+    width = int.from_bytes(header[4:], "big")
+    if size == 8:
+        return
+    if width == 0 or (size - 8) % width != 0:
+        raise ValueError(f"{path} size {size} does not match record width {width}")
+    for chunk in _mapped_chunks(path, 8, width):
+        yield [chunk[i: i + width] for i in range(0, len(chunk), width)]
+
+
+def iter_items(
+    path: str,
+    data_format: str = "text",
+    trim: str = "right",
+    case: Optional[str] = None,
+    id_width: Optional[int] = None,
+) -> Iterator[List[bytes]]:
+    """
+    parse the input file chunk by chunk, the file is memory mapped so only the current chunk is held in memory
+
+    :param path: input file path
+    :param data_format: "text", one item per line, or "binary", fixed width records written by save_binary
+    :param trim: strip whitespaces of every text line, in the "right", "both" or "none" side
+    :param case: convert ascii letters of text lines to "lower" or "upper" case, lines are not converted if it is None
+    :param id_width: parse every text line as a decimal integer and encode it as id_width bytes big endian integer
+    :return: iterator of item lists
+    """
+    if data_format == "text":
+        return _text_items(path, trim, case, id_width)
+    elif data_format == "binary":
+        return _binary_items(path)
+    else:
+        raise ValueError(f"unknown data format {data_format}, it should be text or binary")
+
+
+def load(
+    path: str,
+    data_format: str = "text",
+    dedup: bool = True,
+    trim: str = "right",
+    case: Optional[str] = None,
+    id_width: Optional[int] = None,
+) -> List[bytes]:
+    """
+    load all items of the input file, see iter_items for the parsing parameters
+
+    :param dedup: drop repeated items and keep the first one, repeated items can not be placed in a cuckoo hash table
+    :return: items in the file order
+    """
+    chunks = iter_items(path, data_format, trim, case, id_width)
+    if dedup:
+        # dict keeps the insertion order
+        items = {}
+        for chunk in chunks:
+            items.update(dict.fromkeys(chunk))
+        return list(items)
+    else:
+        res = []
+        for chunk in chunks:
+            res.extend(chunk)
+        return res
+
+
+def load_rows(
+    path: str,
+    data_format: str = "text",
+    trim: str = "right",
+    case: Optional[str] = None,
+    id_width: Optional[int] = None,
+) -> Dict[bytes, int]:
+    """
+    load all distinct items of the input file with their rows, see iter_items for the parsing parameters
+
+    :return: 0-based input row of the first occurrence of every item, in the file order
+    """
+    res = {}
+    row = 0
+    for chunk in iter_items(path, data_format, trim, case, id_width):
+        for item, i in zip(chunk, range(row, row + len(chunk))):
+            res.setdefault(item, i)
+        row += len(chunk)
+    return res
+
+
+class PartyInput(NamedTuple):
+    items: List[bytes]  # all items, empty if they are partitioned into buckets
+    chunks: Optional[Iterator[List[bytes]]]  # item lists to partition into buckets, None if items are loaded
+    rows: Optional[Dict[bytes, int]]  # input row of every item, only for "index" result format
+
+
+def load_input(
+    path: str,
+    data_format: str = "text",
+    dedup: bool = True,
+    trim: str = "right",
+    case: Optional[str] = None,
+    id_width: Optional[int] = None,
+    result_format: str = "text",
+    bucketed: bool = False,
+    shards: int = 1,
+) -> PartyInput:
+    """
+    load the input of a psi party in the way its mode needs, see iter_items for the parsing parameters
+
+    :param dedup: drop repeated items, they are always dropped with "index" result format
+    :param result_format: result file format, input rows are loaded for "index" format
+    :param bucketed: items are partitioned into buckets on disk, so they are parsed chunk by chunk in prepare stage
+    :param shards: shard count, it can not be greater than 1 if items are bucketed
+    """
+    if bucketed and shards > 1:
+        raise ValueError("bucket_memory and shards can not be used together")
+    if bucketed:
+        if result_format == "index":
+            raise ValueError("index result format is not supported with bucket_memory")
+        return PartyInput([], iter_items(path, data_format, trim, case, id_width), None)
+    if result_format == "index":
+        rows = load_rows(path, data_format, trim, case, id_width)
+        return PartyInput(list(rows), None, rows)
+    return PartyInput(load(path, data_format, dedup, trim, case, id_width), None, None)
+
+
+def save_binary(path: str, items: Iterable[bytes], width: int):
+    """
+    save items as a binary input file, every item should be width bytes
+    """
+    with open(path, mode="wb") as f:
+        f.write(binary_magic + width.to_bytes(4, "big"))
+        for item in items:
+            if len(item) != width:
+                raise ValueError(f"item length {len(item)} is not equal to record width {width}")
+            f.write(item)
+
+
+def item_to_str(item: bytes, data_format: str = "text", id_width: Optional[int] = None) -> str:
+    """
+    format an item loaded with the same parameters back as text,
+    integer ids are written in decimal and binary records in hex
+    """
+    if data_format == "binary":
+        return item.hex()
+    elif id_width is not None:
+        return str(int.from_bytes(item, "big"))
+    else:
+        return item.decode("utf-8")
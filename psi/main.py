@@ -10,6 +10,10 @@ host: "127.0.0.1"
 port: 1234
 data: "data.txt"
 result: "result.txt"
+curve: "secp256r1"
+stat_security: 40
+workers: 1
+pipeline: false
 
 """
 
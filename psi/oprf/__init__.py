@@ -1,2 +1,4 @@
 from .client import Client
-from .server import Server
+from .server import Server, ServerState
+from .pool import ServerPool
+from .aio import AsyncClient, AsyncServer
@@ -0,0 +1,76 @@
+from concurrent.futures import Executor
+from typing import Optional, Sequence
+
+from .client import Client
+from .server import Server
+from ..base import async_send_batch, async_recv_batch
+from ..extension import AsyncSender, AsyncReceiver
+from ..pair import AsyncPair
+from ..utils import run_in_executor
+
+__all__ = ["AsyncClient", "AsyncServer"]
+
+
+class AsyncClient(Client):
+    """
+    oprf client with a coroutine prepare stage, matrix operations run in the executor.
+    eval, eval_range and eval_all need no communication, so they are the same as Client.
+    """
+
+    def __init__(
+        self,
+        pair: AsyncPair,
+        r: Sequence[bytes],
+        codewords: int = 128,
+        curve: str = "secp256r1",
+        output_length: int = 32,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        :param executor: executor of the cpu heavy operations, the default executor of the running loop if it is None
+        """
+        super(AsyncClient, self).__init__(pair, r, codewords, curve, output_length)
+        self._executor = executor
+
+    async def prepare(self):
+        await run_in_executor(self._executor, self._encode_inputs)
+        t_cols_bytes, u_cols_bytes = await run_in_executor(self._executor, self._base_messages)
+        if self._codewords == 128:
+            await async_send_batch(self._pair, t_cols_bytes, u_cols_bytes, self._curve, self._executor)
+        else:
+            sender = AsyncSender(self._pair, 128, self._curve, self._executor)
+            await sender.prepare()
+            await sender.send_many(t_cols_bytes, u_cols_bytes)
+        await self._pair.barrier()
+
+
+class AsyncServer(Server):
+    """
+    oprf server with a coroutine prepare stage, matrix operations run in the executor.
+    eval and eval_batch need no communication, so they are the same as Server.
+    """
+
+    def __init__(
+        self,
+        pair: AsyncPair,
+        codewords: int = 128,
+        curve: str = "secp256r1",
+        output_length: int = 32,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        :param executor: executor of the cpu heavy operations, the default executor of the running loop if it is None
+        """
+        super(AsyncServer, self).__init__(pair, codewords, curve, output_length)
+        self._executor = executor
+
+    async def prepare(self):
+        self._choose_s()
+        if self._codewords == 128:
+            q_cols = await async_recv_batch(self._pair, self._s.tolist(), self._curve, self._executor)
+        else:
+            receiver = AsyncReceiver(self._pair, self._s, 128, self._curve, self._executor)
+            await receiver.prepare()
+            q_cols = await receiver.recv_many(self._s.size)
+        await self._pair.barrier()
+        await run_in_executor(self._executor, self._load_q, q_cols)
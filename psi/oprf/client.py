@@ -1,66 +1,103 @@
-from typing import Sequence
+from typing import List, Optional, Sequence, Tuple
 
 import numpy as np
-from Crypto.Hash import SHAKE256, SHA256
+from Crypto.Hash import SHA256
 
+from .encode import encode
 from .. import base
 from ..extension import Sender
 from ..pair import Pair
-from ..serialize import bytes_to_bit_arr, int_to_bytes, bit_arr_to_bytes
-from ..utils import rand_binary_arr
+from ..serialize import int_to_bytes
+from ..utils import BitMatrix
 
 
 class Client(object):
     _pair: Pair
-    _r: np.ndarray
-    _t: np.ndarray
+    _inputs: Optional[Sequence[bytes]]  # inputs before they are encoded in prepare stage
+    _r: Optional[BitMatrix]  # encoded inputs
+    _t: BitMatrix
     _codewords: int
+    _curve: str  # elliptic curve used by base OT
+    _output_length: int  # oprf output length, SHA256 digest is truncated to this length
+    _batch_size: int = 1 << 16  # max rows hashed at once in eval_range, bounds temporary memory
 
-    def __init__(self, pair: Pair, r: Sequence[bytes], codewords: int = 128):
+    def __init__(self, pair: Pair, r: Sequence[bytes], codewords: int = 128, curve: str = "secp256r1",
+                 output_length: int = 32):
         self._pair = pair
         if codewords < 128:
             raise ValueError(f"codewords {codewords} is too small,"
                              f" it should be greater equal than 128 to ensure security")
         self._codewords = codewords
+        self._curve = curve
+        if not 0 < output_length <= 32:
+            raise ValueError(f"output length {output_length} should be in range (0, 32]")
+        self._output_length = output_length
 
-        self._r = np.empty((len(r), self._codewords), dtype=np.uint8)
-        codewords_bytes = int_to_bytes(self._codewords)
-        for i, word in enumerate(r):
-            word_arr = bytes_to_bit_arr(codewords_bytes + self._encode(word))
-            self._r[i] = word_arr
+        self._inputs = r
+        self._r = None
 
-    def _encode(self, data: bytes):
-        shake = SHAKE256.new(data)
-        length = (self._codewords + 7) // 8
-        return shake.read(length)
+    def _encode_inputs(self):
+        """
+        encode the inputs to codewords, it is done in prepare stage, so the constructor is cheap
+        """
+        self._r = encode(self._inputs, self._codewords)
+        self._inputs = None
 
     def prepare(self):
-        m = self._r.shape[0]
-        self._t = rand_binary_arr((m, self._codewords))
-        u = self._t ^ self._r
+        self._encode_inputs()
+        t_cols_bytes, u_cols_bytes = self._base_messages()
         if self._codewords == 128:
-            for i in range(self._codewords):
-                ti_bytes = bit_arr_to_bytes(self._t[:, i])
-                ui_bytes = bit_arr_to_bytes(u[:, i])
-                base.send(self._pair, ti_bytes, ui_bytes)
+            base.send_batch(self._pair, t_cols_bytes, u_cols_bytes, self._curve)
         else:
-            sender = Sender(self._pair, 128)
+            sender = Sender(self._pair, 128, self._curve)
             sender.prepare()
-
-            for i in range(self._codewords):
-                ti_bytes = bit_arr_to_bytes(self._t[:, i])
-                ui_bytes = bit_arr_to_bytes(u[:, i])
-                sender.send(ti_bytes, ui_bytes)
+            sender.send_many(t_cols_bytes, u_cols_bytes)
         self._pair.barrier()
 
+    def _base_messages(self) -> Tuple[List[bytes], List[bytes]]:
+        """
+        choose t, and make the base ot messages, the columns of t and t xor r
+
+        :return: m0s and m1s of base ots
+        """
+        m = self._r.rows
+        self._t = BitMatrix.rand(m, self._codewords)
+        u = self._t ^ self._r
+        t_cols = self._t.T
+        u_cols = u.T
+        m_bytes = int_to_bytes(m)
+        t_cols_bytes = [m_bytes + t_cols.row_bytes(i) for i in range(self._codewords)]
+        u_cols_bytes = [m_bytes + u_cols.row_bytes(i) for i in range(self._codewords)]
+        return t_cols_bytes, u_cols_bytes
+
+    @property
+    def output_length(self) -> int:
+        return self._output_length
+
     @property
     def max_count(self) -> int:
         if self._r is None:
             return 0
-        return self._r.shape[0]
+        return self._r.rows
 
     def eval(self, i: int) -> bytes:
         if i >= self.max_count:
             raise IndexError(f"i is greater than oprf instance count {self.max_count}")
-        ti = self._t[i, :]
-        return SHA256.new(bit_arr_to_bytes(ti)[4:]).digest()
+        return SHA256.new(self._t.row_bytes(i)).digest()[:self._output_length]
+
+    def eval_range(self, start: int, stop: int) -> np.ndarray:
+        """
+        evaluate oprf for instances in [start, stop), same as calling eval(i) for each i
+
+        :return: 2-d uint8 array, shape: (stop - start) * output_length, row j is the oprf output of instance start + j
+        """
+        if start < 0 or stop > self.max_count or start > stop:
+            raise IndexError(f"range [{start}, {stop}) is out of oprf instance count {self.max_count}")
+        res = np.empty((stop - start, self._output_length), dtype=np.uint8)
+        for i in range(start, stop, self._batch_size):
+            j = min(i + self._batch_size, stop)
+            res[i - start: j - start] = self._t[i:j].hash_rows()[:, :self._output_length]
+        return res
+
+    def eval_all(self) -> np.ndarray:
+        return self.eval_range(0, self.max_count)
@@ -0,0 +1,51 @@
+from typing import Sequence
+
+import numpy as np
+
+from ..cipher.hash import shake_rows
+from ..utils import BitMatrix
+
+__all__ = ["encode"]
+
+
+def encode(data: Sequence[bytes], codewords: int) -> BitMatrix:
+    """
+    encode inputs to codewords, row i is the same as bytes_to_bit_arr(int_to_bytes(codewords) + SHAKE256(data[i]))
+
+    :param data: inputs
+    :param codewords: codewords length
+    :return: bit matrix, shape: len(data) * codewords
+    """
+    length = (codewords + 7) // 8
+    res = shake_rows(data, length)
+    if codewords % 8 != 0:
+        res = res.copy()
+        res[:, 0] &= (1 << (codewords % 8)) - 1
+    return BitMatrix(res, codewords)
+
+
+if __name__ == '__main__':
+    import time
+
+    from Crypto.Hash import SHAKE256
+
+    from ..serialize import bytes_to_bit_arr, int_to_bytes
+
+    codewords = 512
+    for size in [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]:
+        words = [str(i).encode("utf-8") for i in range(size)]
+
+        start = time.time()
+        encode(words, codewords)
+        batch_time = time.time() - start
+
+        if size <= 10 ** 5:
+            start = time.time()
+            r = np.empty((size, codewords), dtype=np.uint8)
+            codewords_bytes = int_to_bytes(codewords)
+            for i, word in enumerate(words):
+                r[i] = bytes_to_bit_arr(codewords_bytes + SHAKE256.new(word).read(codewords // 8))
+            row_time = time.time() - start
+            print(f"size {size}: batch {batch_time:.3f}s, row by row {row_time:.3f}s")
+        else:
+            print(f"size {size}: batch {batch_time:.3f}s")
@@ -0,0 +1,128 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+
+from .server import Server, ServerState
+from ..utils import BitMatrix
+
+__all__ = ["ServerPool"]
+
+_worker_server: Optional[Server] = None
+_worker_shm: Optional[SharedMemory] = None
+
+
+def _init_worker(name: str, rows: int, cols: int, codewords: int, output_length: int):
+    global _worker_server, _worker_shm
+    _worker_shm = SharedMemory(name)
+    data = np.ndarray((rows + 1, (cols + 7) // 8), dtype=np.uint8, buffer=_worker_shm.buf)
+    q = BitMatrix(data[:rows], cols)
+    s = BitMatrix(data[rows:], cols)
+    _worker_server = Server.from_state(ServerState(q=q, s=s, codewords=codewords, output_length=output_length))
+
+
+def _eval_shard(indices: np.ndarray, data: Sequence[bytes]) -> np.ndarray:
+    return _worker_server.eval_batch(indices, data)
+
+
+class ServerPool(object):
+    """
+    process pool evaluating a prepared oprf server.
+    q and s are copied once into shared memory and mapped by every worker instead of being pickled for each task.
+    """
+
+    _shard_size: int = 1 << 16  # inputs evaluated by one task
+
+    def __init__(self, server: Server, workers: int):
+        """
+        :param server: prepared oprf server
+        :param workers: worker process count
+        """
+        if workers < 1:
+            raise ValueError(f"workers {workers} should be greater equal than 1")
+        self._workers = workers
+        state = server.state()
+        q = state.q
+        self._shm = SharedMemory(create=True, size=(q.rows + 1) * q.data.shape[1])
+        data = np.ndarray((q.rows + 1, q.data.shape[1]), dtype=np.uint8, buffer=self._shm.buf)
+        data[:q.rows] = q.data
+        data[q.rows:] = state.s.data
+        del data
+        self._executor = ProcessPoolExecutor(
+            workers,
+            initializer=_init_worker,
+            initargs=(self._shm.name, q.rows, q.cols, state.codewords, state.output_length),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+        self._shm.close()
+        self._shm.unlink()
+
+    def eval_batch(self, indices: Sequence[int], data: Sequence[bytes]) -> Iterator[np.ndarray]:
+        """
+        evaluate oprf for many inputs in the worker processes, same as Server.eval_batch,
+        but the outputs are yielded shard by shard in input order as soon as they are ready
+
+        :param indices: oprf instance index of each input
+        :param data: inputs
+        :return: iterator of 2-d uint8 arrays, the outputs of consecutive shards of the inputs
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if indices.shape != (len(data),):
+            raise ValueError(f"indices length {indices.size} is not equal to data length {len(data)}")
+
+        # at most two shards for each worker are in flight, so pending inputs and outputs stay bounded
+        pending = deque()
+        for start in range(0, len(data), self._shard_size):
+            stop = start + self._shard_size
+            pending.append(self._executor.submit(_eval_shard, indices[start:stop], data[start:stop]))
+            if len(pending) >= 2 * self._workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+if __name__ == '__main__':
+    import os
+    import time
+
+    from ..utils import rand_binary_arr
+
+    # keys of a table of 1.3 million positions, random keys evaluate as fast as prepared ones
+    count = 1 << 20
+    rows = count * 13 // 10
+    codewords = 512
+    server = Server.from_state(ServerState(
+        q=BitMatrix.rand(rows, codewords),
+        s=BitMatrix.from_bit_arr(rand_binary_arr(codewords)),
+        codewords=codewords,
+        output_length=10,
+    ))
+    indices = np.random.randint(0, rows, count)
+    words = [str(i).encode("utf-8") for i in range(count)]
+
+    start = time.time()
+    server.eval_batch(indices, words)
+    base_cost = time.time() - start
+    print(f"{count} evaluations in this process: {base_cost:.3f}s")
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        with ServerPool(server, workers) as pool:
+            # the first task starts the workers
+            next(pool.eval_batch(indices[:1], words[:1]))
+            start = time.time()
+            for _ in pool.eval_batch(indices, words):
+                pass
+            cost = time.time() - start
+        print(f"{count} evaluations in {workers} workers: {cost:.3f}s, speedup {base_cost / cost:.2f}")
+        workers *= 2
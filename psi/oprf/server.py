@@ -1,79 +1,132 @@
+from typing import List, NamedTuple, Optional, Sequence
+
 import numpy as np
-from Crypto.Hash import SHAKE256, SHA256
+from Crypto.Hash import SHA256
 
+from .encode import encode
 from .. import base
 from ..extension import Receiver
 from ..pair import Pair
-from ..serialize import bytes_to_bit_arr, int_to_bytes, bit_arr_to_bytes
-from ..utils import rand_binary_arr
+from ..serialize import bytes_to_packed_bit_arr
+from ..utils import rand_binary_arr, BitMatrix
+
+
+class ServerState(NamedTuple):
+    """
+    keys of a prepared oprf server, enough to evaluate it without the pair
+    """
+
+    q: BitMatrix
+    s: BitMatrix  # s packed as a matrix with one row
+    codewords: int
+    output_length: int
 
 
 class Server(object):
-    _pair: Pair
+    _pair: Optional[Pair]
     _s: np.ndarray
-    _q: np.ndarray
+    _s_mask: BitMatrix  # s packed as a matrix with one row
+    _q: BitMatrix
     _codewords: int
+    _curve: str  # elliptic curve used by base OT
+    _output_length: int  # oprf output length, SHA256 digest is truncated to this length
+    _batch_size: int = 1 << 16  # max rows evaluated at once in eval_batch, bounds temporary memory
 
-    def __init__(self, pair: Pair, codewords: int = 128):
+    def __init__(
+        self, pair: Optional[Pair], codewords: int = 128, curve: str = "secp256r1", output_length: int = 32
+    ):
+        """
+        :param pair: pair of the oprf client, None if the server is made from a state by from_state
+        """
         self._pair = pair
         if codewords < 128:
             raise ValueError(f"codewords {codewords} is too small,"
                              f" it should be greater equal than 128 to ensure security")
         self._codewords = codewords
+        self._curve = curve
+        if not 0 < output_length <= 32:
+            raise ValueError(f"output length {output_length} should be in range (0, 32]")
+        self._output_length = output_length
+        self._q = None
 
     def prepare(self):
+        self._choose_s()
+        if self._codewords == 128:
+            # q (keys), columns of q, bytes of 0,1 arr
+            q_cols = base.recv_batch(self._pair, self._s.tolist(), self._curve)
+        else:
+            receiver = Receiver(self._pair, self._s, 128, self._curve)
+            receiver.prepare()
+            q_cols = receiver.recv_many(self._s.size)
+        self._pair.barrier()
+        self._load_q(q_cols)
+
+    def _choose_s(self):
         # s (select bits for prepare stage)
         self._s = rand_binary_arr(self._codewords)
+        self._s_mask = BitMatrix.from_bit_arr(self._s)
         # q (keys)
         self._q = None
-        m = 0
-        q_cols = []
 
-        if self._codewords == 128:
-            # q (keys)
-            for i, b in enumerate(self._s):
-                q_col = base.recv(self._pair, b)  # column of q, bytes of 0,1 arr
-                if m == 0:
-                    m = len(q_col)
-                else:
-                    assert m == len(q_col), f"base OT message length should be all the same, but the round {i} is not"
-                q_cols.append(q_col)
-        else:
-            receiver = Receiver(self._pair, self._s, 128)
-            receiver.prepare()
+    def _load_q(self, q_cols: List[bytes]):
+        for i, q_col in enumerate(q_cols):
+            assert len(q_col) == len(q_cols[0]), f"base OT message length should be all the same, but the round {i} is not"
+        cols = [bytes_to_packed_bit_arr(col) for col in q_cols]
+        self._q = BitMatrix.from_bytes([col for _, col in cols], cols[0][0]).T
 
-            for i in range(self._s.size):
-                q_col = receiver.recv()
-                if m == 0:
-                    m = len(q_col)
-                else:
-                    assert m == len(q_col), f"base OT message length should be all the same, but the round {i} is not"
-                q_cols.append(q_col)
-        self._pair.barrier()
+    def state(self) -> ServerState:
+        """
+        :return: keys of the prepared server, such as for evaluating it in other processes
+        """
+        if self._q is None:
+            raise ValueError("oprf server is not prepared")
+        return ServerState(q=self._q, s=self._s_mask, codewords=self._codewords, output_length=self._output_length)
 
-        self._q = np.vstack([bytes_to_bit_arr(col) for col in q_cols]).T
+    @classmethod
+    def from_state(cls, state: ServerState) -> "Server":
+        """
+        make a prepared server of the keys returned by state, it has no pair and can only be evaluated
+        """
+        server = cls(None, state.codewords, output_length=state.output_length)
+        server._s = state.s.to_bit_arr()[0]
+        server._s_mask = state.s
+        server._q = state.q
+        return server
 
-    def _encode(self, data: bytes) -> bytes:
-        shake = SHAKE256.new(data)
-        length = (self._codewords + 7) // 8
-        return shake.read(length)
+    @property
+    def output_length(self) -> int:
+        return self._output_length
 
     @property
     def max_count(self) -> int:
         if self._q is None:
             return 0
         else:
-            return self._q.shape[0]
-
-    def _eval_op(self, i: int, enc_data: np.ndarray):
-        qi = self._q[i, :]
-        return qi ^ (self._s & enc_data)
+            return self._q.rows
 
     def eval(self, i: int, data: bytes) -> bytes:
         if i >= self.max_count:
             raise IndexError(f"i is greater than oprf instance count {self.max_count}")
-        enc_data = self._encode(data)
-        enc_data_arr = bytes_to_bit_arr(int_to_bytes(self._codewords) + enc_data)
+        res = self._q[i] ^ (self._s_mask & encode([data], self._codewords))
+        return SHA256.new(res.row_bytes(0)).digest()[:self._output_length]
+
+    def eval_batch(self, indices: Sequence[int], data: Sequence[bytes]) -> np.ndarray:
+        """
+        evaluate oprf for many inputs, same as calling eval(indices[j], data[j]) for each j
+
+        :param indices: oprf instance index of each input
+        :param data: inputs
+        :return: 2-d uint8 array, shape: len(data) * output_length, row j is the oprf output of data[j]
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if indices.shape != (len(data),):
+            raise ValueError(f"indices length {indices.size} is not equal to data length {len(data)}")
+        if indices.size > 0 and indices.max() >= self.max_count:
+            raise IndexError(f"index is greater than oprf instance count {self.max_count}")
 
-        res = self._eval_op(i, enc_data_arr)
-        return SHA256.new(bit_arr_to_bytes(res)[4:]).digest()
+        res = np.empty((len(data), self._output_length), dtype=np.uint8)
+        for start in range(0, len(data), self._batch_size):
+            stop = min(start + self._batch_size, len(data))
+            vals = self._q[indices[start:stop]] ^ (self._s_mask & encode(data[start:stop], self._codewords))
+            res[start:stop] = vals.hash_rows()[:, :self._output_length]
+        return res
@@ -1,2 +1,7 @@
 from .pair import Address, Pair
-from .factory import make_pair
+from .factory import make_pair, make_pairs
+from .array import send_array, send_array_chunks, recv_array, recv_array_chunks
+from .aio import (
+    AsyncPair, connect_pair, serve_pairs,
+    async_send_array, async_send_array_chunks, async_recv_array, async_recv_array_chunks,
+)
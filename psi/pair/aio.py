@@ -0,0 +1,162 @@
+import asyncio
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Optional
+
+import numpy as np
+
+from .array import _chunk_bytes
+from .pair import Address
+from ..serialize import int_to_bytes, bytes_to_int
+
+__all__ = [
+    "AsyncPair", "connect_pair", "serve_pairs",
+    "async_send_array", "async_send_array_chunks", "async_recv_array", "async_recv_array_chunks",
+]
+
+
+class AsyncPair(object):
+    """
+    pair over an asyncio stream, the coroutine counterpart of SocketPair with the same message framing.
+    one event loop can drive many pairs, every pair costs a stream and no thread.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, timeout: Optional[float] = None):
+        """
+        :param timeout: max seconds to wait for one message, wait forever if it is None
+        """
+        self._reader = reader
+        self._writer = writer
+        self._timeout = timeout
+        self._local = Address(*writer.get_extra_info("sockname")[:2])
+        self._peer = Address(*writer.get_extra_info("peername")[:2])
+
+    @property
+    def local_addr(self) -> Address:
+        return self._local
+
+    @property
+    def peer_addr(self) -> Address:
+        return self._peer
+
+    async def send(self, data: bytes):
+        self._writer.write(int_to_bytes(len(data)))
+        self._writer.write(data)
+        # wait only if the transport buffer is full, so consecutive small messages are not delayed
+        await self._writer.drain()
+
+    async def recv(self) -> bytes:
+        return await asyncio.wait_for(self._recv(), self._timeout)
+
+    async def _recv(self) -> bytes:
+        try:
+            length = bytes_to_int(await self._reader.readexactly(4))
+            return await self._reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            raise ConnectionError("connection closed by peer")
+
+    async def barrier(self):
+        await self.send(b"barrier")
+        msg = await self.recv()
+        assert msg == b"barrier"
+
+    async def close(self):
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+async def connect_pair(host: str, port: int, timeout: Optional[float] = 10) -> AsyncPair:
+    """
+    connect to a peer served by serve_pairs
+    """
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    return AsyncPair(reader, writer, timeout)
+
+
+async def serve_pairs(
+    handler: Callable[[AsyncPair], Awaitable[None]], host: str, port: int, timeout: Optional[float] = 10
+) -> asyncio.AbstractServer:
+    """
+    accept peers on host:port, handler is run as a new task with the pair of every connection,
+    the pair is closed when the handler returns
+
+    :return: the listening server, close it to stop accepting
+    """
+
+    async def on_connect(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        async with AsyncPair(reader, writer, timeout) as pair:
+            await handler(pair)
+
+    return await asyncio.start_server(on_connect, host, port)
+
+
+async def async_send_array(pair: AsyncPair, arr: np.ndarray):
+    """
+    coroutine version of pair.send_array
+    """
+    count, width = arr.shape
+
+    async def chunks():
+        yield arr
+
+    await async_send_array_chunks(pair, count, width, chunks())
+
+
+async def async_send_array_chunks(pair: AsyncPair, count: int, width: int, chunks: AsyncIterable[np.ndarray]):
+    """
+    coroutine version of pair.send_array_chunks, chunks are produced by an async iterable,
+    such as utils.iterate_in_executor, so producing chunks overlaps with sending them
+    """
+    await pair.send(int_to_bytes(count) + int_to_bytes(width))
+    rows = max(_chunk_bytes // max(width, 1), 1)
+    sent = 0
+    async for chunk in chunks:
+        if chunk.shape[1] != width or sent + chunk.shape[0] > count:
+            raise ValueError(f"chunk shape {chunk.shape} does not match array shape {(count, width)}")
+        for start in range(0, chunk.shape[0], rows):
+            await pair.send(np.ascontiguousarray(chunk[start: start + rows]).tobytes())
+        sent += chunk.shape[0]
+    if sent != count:
+        raise ValueError(f"sent row count {sent} is not equal to array row count {count}")
+
+
+async def async_recv_array(pair: AsyncPair) -> np.ndarray:
+    """
+    coroutine version of pair.recv_array
+    """
+    header = await pair.recv()
+    count = bytes_to_int(header[:4])
+    width = bytes_to_int(header[4:])
+    res = np.empty((count, width), dtype=np.uint8)
+    view = res.reshape(-1)
+    offset = 0
+    while offset < view.size:
+        data = await pair.recv()
+        if offset + len(data) > view.size:
+            raise ValueError(f"received {offset + len(data)} bytes, but the array has {view.size} bytes")
+        view[offset: offset + len(data)] = np.frombuffer(data, dtype=np.uint8)
+        offset += len(data)
+    return res
+
+
+async def async_recv_array_chunks(pair: AsyncPair) -> AsyncIterator[np.ndarray]:
+    """
+    coroutine version of pair.recv_array_chunks
+    """
+    header = await pair.recv()
+    count = bytes_to_int(header[:4])
+    width = bytes_to_int(header[4:])
+    received = 0
+    while received < count * width:
+        data = await pair.recv()
+        if len(data) % max(width, 1) != 0:
+            raise ValueError(f"chunk length {len(data)} is not a multiple of row width {width}")
+        received += len(data)
+        yield np.frombuffer(data, dtype=np.uint8).reshape((-1, width))
@@ -0,0 +1,73 @@
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from .pair import Pair
+from ..serialize import int_to_bytes, bytes_to_int
+
+__all__ = ["send_array", "send_array_chunks", "recv_array", "recv_array_chunks"]
+
+_chunk_bytes = 1 << 20  # max bytes in one message
+
+
+def send_array(pair: Pair, arr: np.ndarray):
+    """
+    send a 2-d uint8 array of fixed width rows, row count and width are sent first,
+    then rows are sent in chunks of about 1 MB
+    """
+    count, width = arr.shape
+    send_array_chunks(pair, count, width, [arr])
+
+
+def send_array_chunks(pair: Pair, count: int, width: int, chunks: Iterable[np.ndarray]):
+    """
+    send consecutive row chunks of a 2-d uint8 array as they are produced, the receiver gets one array by recv_array
+
+    :param count: total row count of all chunks
+    :param width: row width
+    :param chunks: 2-d uint8 arrays of width columns
+    """
+    pair.send(int_to_bytes(count) + int_to_bytes(width))
+    rows = max(_chunk_bytes // max(width, 1), 1)
+    sent = 0
+    for chunk in chunks:
+        if chunk.shape[1] != width or sent + chunk.shape[0] > count:
+            raise ValueError(f"chunk shape {chunk.shape} does not match array shape {(count, width)}")
+        for start in range(0, chunk.shape[0], rows):
+            pair.send(np.ascontiguousarray(chunk[start: start + rows]).tobytes())
+        sent += chunk.shape[0]
+    if sent != count:
+        raise ValueError(f"sent row count {sent} is not equal to array row count {count}")
+
+
+def recv_array(pair: Pair) -> np.ndarray:
+    """
+    receive a 2-d uint8 array sent by send_array, chunks are received into a preallocated array
+    """
+    header = pair.recv()
+    count = bytes_to_int(header[:4])
+    width = bytes_to_int(header[4:])
+    res = np.empty((count, width), dtype=np.uint8)
+    view = memoryview(res.reshape(-1))
+    offset = 0
+    while offset < len(view):
+        offset += pair.recv_into(view[offset:])
+    return res
+
+
+def recv_array_chunks(pair: Pair) -> Iterator[np.ndarray]:
+    """
+    receive a 2-d uint8 array sent by send_array or send_array_chunks, rows are yielded as soon as they arrive
+
+    :return: iterator of 2-d uint8 arrays, consecutive row chunks of the array
+    """
+    header = pair.recv()
+    count = bytes_to_int(header[:4])
+    width = bytes_to_int(header[4:])
+    received = 0
+    while received < count * width:
+        data = pair.recv()
+        if len(data) % max(width, 1) != 0:
+            raise ValueError(f"chunk length {len(data)} is not a multiple of row width {width}")
+        received += len(data)
+        yield np.frombuffer(data, dtype=np.uint8).reshape((-1, width))
@@ -1,4 +1,4 @@
-from typing import Union, Tuple
+from typing import List, Union, Tuple
 
 from .loop_socket import LoopSocketPair
 from .pair import Pair, Address
@@ -14,3 +14,11 @@ def make_pair(local: AddrType = Address(), peer: AddrType = Address(),
     elif type == "loop":
         return LoopSocketPair(local, peer, timeout)
     raise ValueError(f"unsupported pair type: {type}")
+
+
+def make_pairs(local: AddrType = Address(), peer: AddrType = Address(), count: int = 1, timeout: int = 10) -> List[Pair]:
+    """
+    make count pairs multiplexed over one connection. channels are matched with the peer by registration order,
+    so they are registered here one by one, and the peer should make the same count of pairs
+    """
+    return [LoopSocketPair(local, peer, timeout) for _ in range(count)]
@@ -0,0 +1,109 @@
+import socket
+from typing import List, Optional, Tuple
+
+from .message import Message
+from ...serialize import bytes_to_int
+
+__all__ = ["FrameDecoder"]
+
+_chunk_size = 1 << 20  # max bytes read from the socket at once, and the size of the shared read buffer
+_large_frame = 1 << 16  # data of at least this length is received into a buffer of its own frame
+
+
+class FrameDecoder(object):
+    """
+    incremental decoder of the frames of the loop transport, a frame is the 4 bytes body length and the body,
+    which is the 4 bytes message id and the data.
+
+    bytes are read into a shared buffer and partial frames are kept there between reads. data of large frames
+    is read straight into a bytearray of the frame, and handed out as a memoryview of it without copying.
+    """
+
+    def __init__(self, chunk_size: int = _chunk_size, large_frame: int = _large_frame):
+        if chunk_size < large_frame + 8:
+            raise ValueError(f"chunk size {chunk_size} should be greater than large frame size {large_frame} + 8")
+        self._large_frame = large_frame
+        self._buf = bytearray(chunk_size)
+        self._start = 0  # first byte not decoded yet
+        self._end = 0  # end of the bytes received into the shared buffer
+
+        # the large frame being received
+        self._frame: Optional[bytearray] = None
+        self._frame_id = 0
+        self._frame_received = 0
+
+    def recv_from(self, sock: socket.socket) -> Tuple[List[Message], bool]:
+        """
+        read from a non-blocking socket until it would block
+
+        :return: decoded messages, and whether the connection is closed by peer
+        """
+        messages = []
+        while True:
+            if self._frame is not None:
+                with memoryview(self._frame) as view:
+                    n = self._recv_into(sock, view[self._frame_received:])
+                if n is None:
+                    return messages, False
+                if n == 0:
+                    return messages, True
+                self._frame_received += n
+                if self._frame_received == len(self._frame):
+                    messages.append(Message.from_frame(self._frame_id, memoryview(self._frame)))
+                    self._frame = None
+                continue
+
+            if self._end == len(self._buf):
+                # move the partial frame to the front, it is shorter than a small frame so it always fits
+                self._buf[:self._end - self._start] = self._buf[self._start:self._end]
+                self._end -= self._start
+                self._start = 0
+            with memoryview(self._buf) as view:
+                n = self._recv_into(sock, view[self._end:])
+            if n is None:
+                return messages, False
+            if n == 0:
+                return messages, True
+            self._end += n
+            self._decode(messages)
+
+    @staticmethod
+    def _recv_into(sock: socket.socket, view: memoryview) -> Optional[int]:
+        """
+        :return: received byte count, 0 if the connection is closed, None if the socket would block
+        """
+        try:
+            return sock.recv_into(view)
+        except (BlockingIOError, InterruptedError):
+            return None
+
+    def _decode(self, messages: List[Message]):
+        """
+        decode the complete frames in the shared buffer, and start receiving a large frame if one begins
+        """
+        with memoryview(self._buf) as view:
+            while self._end - self._start >= 8:
+                length = bytes_to_int(view[self._start: self._start + 4])
+                if length < 4:
+                    raise ValueError(f"frame body length {length} is shorter than the message id")
+                msg_id = bytes_to_int(view[self._start + 4: self._start + 8])
+                size = length - 4
+                body_start = self._start + 8
+                if size >= self._large_frame:
+                    available = min(self._end - body_start, size)
+                    frame = bytearray(size)
+                    frame[:available] = view[body_start: body_start + available]
+                    self._start = body_start + available
+                    if available == size:
+                        messages.append(Message.from_frame(msg_id, memoryview(frame)))
+                        continue
+                    self._frame = frame
+                    self._frame_id = msg_id
+                    self._frame_received = available
+                    break
+                if self._end - body_start < size:
+                    break
+                messages.append(Message.from_frame(msg_id, bytes(view[body_start: body_start + size])))
+                self._start = body_start + size
+        if self._start == self._end:
+            self._start = self._end = 0
@@ -7,17 +7,21 @@ import threading
 import time
 from collections import defaultdict, deque
 from enum import IntEnum
-from typing import Optional, Union, Tuple, DefaultDict, Deque
+from itertools import islice
+from typing import Optional, Union, Tuple, DefaultDict, Deque, Dict
 
+from .decoder import FrameDecoder
 from .message import Message
 from .pipe import make_pipe, Pipe
 from ..pair import Address
-from ...serialize import bytes_to_int, int_to_bytes
+from ..waker import Waker
 
 AddrType = Union[Address, Tuple[str, int]]
 
 _logger = logging.getLogger()
 
+_max_send_pieces = 64  # max buffers sent in one sendmsg call
+
 
 class LoopConnectState(IntEnum):
     INIT = 0
@@ -44,8 +48,17 @@ class LoopThread(threading.Thread):
         self._id_counter = 0
         self._register_lock = threading.Lock()
 
-        self._send_buffer: Deque[Tuple[Message, Pipe]] = deque()
+        # frame pieces waiting to be sent, the pipe is set on the last piece of every message
+        self._send_buffer: Deque[Tuple[memoryview, Optional[Pipe]]] = deque()
+        self._writing = False  # the peer socket is registered for EVENT_WRITE, only while the send buffer is not empty
+        # messages received before their local pair is registered
         self._recv_buffer: DefaultDict[int, Deque[Message]] = defaultdict(deque)
+        self._pipes: Dict[int, Pipe] = {}  # loop side pipe of every registered local pair
+        self._decoder = FrameDecoder()
+
+        # wakes up the loop blocked in select, when a pair is registered or the loop is stopped
+        self._waker = Waker()
+        self._sel.register(self._waker, selectors.EVENT_READ, data="wakeup")
 
     @property
     def local_addr(self):
@@ -62,20 +75,77 @@ class LoopThread(threading.Thread):
                 self._id_counter += 1
 
                 local, remote = make_pipe()
-                self._sel.register(
-                    local, selectors.EVENT_READ | selectors.EVENT_WRITE, data=local_id
-                )
+                # messages of the peer may arrive before the local pair is registered
+                for msg in self._recv_buffer.pop(local_id, ()):
+                    local.send(msg, block=False)
+                self._pipes[local_id] = local
+                self._sel.register(local, selectors.EVENT_READ, data=local_id)
+            self._waker.wake()
             return local_id, remote
         raise TimeoutError(
             f"unable to make connection with peer after {timeout} seconds"
         )
 
-    def unregister(self, local_id: int):
-        pipe = None
-        for key in self._sel.get_map().values():
-            if key.data == local_id:
-                pipe = key.fileobj
-        self._sel.unregister(pipe)
+    def _unregister(self, local_id: int):
+        """
+        remove a closed local pair, called in the loop thread
+        """
+        with self._register_lock:
+            pipe = self._pipes.pop(local_id, None)
+        if pipe is not None:
+            self._sel.unregister(pipe)
+
+    def stop(self):
+        self._stop_event.set()
+        self._waker.wake()
+
+    @staticmethod
+    def _deliver(pipe: Pipe, msg: Message):
+        """
+        pass a message to a local pair, the pair may be dropped without being closed
+        """
+        try:
+            pipe.send(msg, block=False)
+        except OSError:
+            pass
+
+    def _dispatch(self, msg: Message):
+        """
+        pass a received message to its local pair
+        """
+        with self._register_lock:
+            pipe = self._pipes.get(msg.id)
+            if pipe is None:
+                # a local pair of a smaller id is closed already, messages to it are dropped
+                if msg.id >= self._id_counter:
+                    self._recv_buffer[msg.id].append(msg)
+                return
+        self._deliver(pipe, msg)
+
+    def _flush(self):
+        """
+        send buffered frames until the socket would block, write interest is enabled only if some are left
+        """
+        while self._send_buffer:
+            views = [view for view, _ in islice(self._send_buffer, _max_send_pieces)]
+            try:
+                sent = self._sock.sendmsg(views)
+            except (BlockingIOError, InterruptedError):
+                break
+            while self._send_buffer and len(self._send_buffer[0][0]) <= sent:
+                view, pipe = self._send_buffer.popleft()
+                sent -= len(view)
+                if pipe is not None:
+                    # the message is written to the socket, release the barrier of its pair
+                    pipe.task_done()
+            if sent > 0:
+                view, pipe = self._send_buffer[0]
+                self._send_buffer[0] = (view[sent:], pipe)
+        writing = len(self._send_buffer) > 0
+        if writing != self._writing:
+            events = selectors.EVENT_READ | selectors.EVENT_WRITE if writing else selectors.EVENT_READ
+            self._sel.modify(self._sock, events, data="pair")
+            self._writing = writing
 
     def run(self):
         server_sock = socket.socket(family=socket.AF_INET, type=socket.SOCK_STREAM)
@@ -107,9 +177,12 @@ class LoopThread(threading.Thread):
                 not self._stop_event.is_set()
                 and connect_state != LoopConnectState.READY
             ):
-                events = self._sel.select(0)
+                # block until a socket is ready, or the loop is stopped
+                events = self._sel.select()
                 for key, event in events:
-                    if (
+                    if key.data == "wakeup":
+                        self._waker.clear()
+                    elif (
                         key.data == "server"
                         and (event & selectors.EVENT_READ)
                         and connect_state
@@ -132,11 +205,7 @@ class LoopThread(threading.Thread):
                                 peer_sock = sock
                                 connect_state = LoopConnectState.SERVER_SUCCESS
                             elif connect_state == LoopConnectState.SERVER_SUCCESS:
-                                self._sel.register(
-                                    sock,
-                                    selectors.EVENT_READ | selectors.EVENT_WRITE,
-                                    data="pair",
-                                )
+                                self._sel.register(sock, selectors.EVENT_READ, data="pair")
                                 self._sock = sock
                                 self._mode = "server"
                                 connect_state = LoopConnectState.READY
@@ -220,11 +289,7 @@ class LoopThread(threading.Thread):
                     ):
                         err = key.fileobj.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
                         if err == 0:
-                            self._sel.modify(
-                                key.fileobj,
-                                selectors.EVENT_READ | selectors.EVENT_WRITE,
-                                data="pair",
-                            )
+                            self._sel.modify(key.fileobj, selectors.EVENT_READ, data="pair")
                             self._sock = key.fileobj
                             self._mode = "client"
                             connect_state = LoopConnectState.READY
@@ -237,82 +302,48 @@ class LoopThread(threading.Thread):
             self._connect_event.set()
             # main loop
             while not self._stop_event.is_set():
-                events = self._sel.select(0)
+                events = self._sel.select()
                 for key, event in events:
-                    if isinstance(key.data, int) and (event & selectors.EVENT_READ):
+                    if key.data == "wakeup":
+                        self._waker.clear()
+                    elif isinstance(key.data, int):
                         # fetch data from local pair
                         pipe: Pipe = key.fileobj
                         try:
                             msg = pipe.recv(block=False)
-                            self._send_buffer.append((msg, pipe))
-                            _logger.debug(f"fetch msg {msg}")
                         except queue.Empty:
-                            pass
-                    if isinstance(key.data, int) and (event & selectors.EVENT_WRITE):
-                        local_id: int = key.data
-                        pipe: Pipe = key.fileobj
-                        buffer = self._recv_buffer[local_id]
-                        try:
-                            msg = buffer.popleft()
-                            pipe.send(msg, block=False)
-                            _logger.debug(f"dispatch msg {msg}")
-                        except IndexError:
-                            pass
-                    if (
-                        len(self._send_buffer) > 0
-                        and key.data == "pair"
-                        and (event & selectors.EVENT_WRITE)
-                    ):
-                        _logger.debug(f"send buffer: {self._send_buffer}")
-                        words = []
-                        pipes = []
-                        while True:
-                            try:
-                                msg, pipe = self._send_buffer.popleft()
-                                word = msg.encode()
-                                words.append(int_to_bytes(len(word)) + word)
-                                pipes.append(pipe)
-                            except IndexError:
-                                break
-                        if len(words) > 0:
-                            data = b"".join(words)
-                            self._sock.sendall(data)
-                            _logger.debug(f"send data {data}")
-                            for pipe in pipes:
-                                pipe.task_done()
-                    if key.data == "pair" and (event & selectors.EVENT_READ):
-                        data_arr = []
-                        while True:
-                            try:
-                                data = self._sock.recv(4096)
-                                if not data:
-                                    break
-                                data_arr.append(data)
-                            except BlockingIOError as e:
-                                if errno.errorcode[e.errno] == "EAGAIN":
-                                    break
-                                raise e
-
-                        # parse
-                        if len(data_arr) > 0:
-                            data = b"".join(data_arr)
-                            n = 0
-                            length = 0
-                            while n < len(data):
-                                if length == 0:
-                                    length = bytes_to_int(data[n: n + 4])
-                                    n += 4
-                                msg = Message.decode(data[n: n + length])
-                                n += length
-                                self._recv_buffer[msg.id].append(msg)
-                                _logger.debug(f"recv msg: {msg}")
-                                length = 0
+                            continue
+                        if _logger.isEnabledFor(logging.DEBUG):
+                            _logger.debug(f"fetch msg: id {msg.id}, {len(msg.data)} bytes")
+                        self._send_buffer.append((memoryview(msg.header()), None))
+                        self._send_buffer.append((memoryview(msg.data), pipe))
+                        if msg.closed:
+                            # the peer pair is notified by the frame, and a local recv blocked on the pair fails
+                            self._unregister(msg.id)
+                            self._deliver(pipe, msg)
+                    elif key.data == "pair" and (event & selectors.EVENT_READ):
+                        messages, closed = self._decoder.recv_from(self._sock)
+                        for msg in messages:
+                            if _logger.isEnabledFor(logging.DEBUG):
+                                _logger.debug(f"recv msg: id {msg.id}, {len(msg.data)} bytes")
+                            self._dispatch(msg)
+                        if closed:
+                            # the connection is closed by peer, stop after dispatching the received data
+                            self._stop_event.set()
+                # messages fetched in this round are sent together, and the rest when the socket is writable
+                if self._send_buffer:
+                    self._flush()
 
         finally:
+            # pairs blocked in recv fail instead of waiting for messages of the closed connection
+            with self._register_lock:
+                for local_id, pipe in self._pipes.items():
+                    self._deliver(pipe, Message(id=local_id, data=b"", closed=True))
             if self._sock is not None:
-                self._sock.close()
                 self._sel.unregister(self._sock)
+                self._sock.close()
             self._sel.close()
+            self._waker.close()
 
 
 class Loop(object):
@@ -338,6 +369,3 @@ class Loop(object):
 
     def register(self, timeout: Optional[float] = None) -> Tuple[int, Pipe]:
         return self.loop.register(timeout)
-
-    def unregister(self, local_id: int):
-        return self.loop.unregister(local_id)
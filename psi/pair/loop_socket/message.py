@@ -1,18 +1,41 @@
-from typing import NamedTuple
+from typing import NamedTuple, Union
 
 from ...serialize import int_to_bytes, bytes_to_int
 
+_closed_flag = 1 << 31  # set in the frame id of the message closing a pair
+
 
 class Message(NamedTuple):
     id: int
-    data: bytes
+    data: Union[bytes, memoryview]  # data of a large received frame is a memoryview of the frame buffer
+    closed: bool = False  # the pair is closed, the message has no data
+
+    @property
+    def frame_id(self) -> int:
+        """
+        id in the frame header, with the closed flag
+        """
+        return self.id | _closed_flag if self.closed else self.id
 
     def encode(self) -> bytes:
-        body = int_to_bytes(self.id) + self.data
+        body = int_to_bytes(self.frame_id) + self.data
         return body
 
+    def header(self) -> bytes:
+        """
+        frame header, the length of the encoded body and the id. a frame is the header followed by data,
+        so data is sent as it is instead of being copied into the encoded body
+        """
+        id_bytes = int_to_bytes(self.frame_id)
+        return int_to_bytes(len(id_bytes) + len(self.data)) + id_bytes
+
+    @classmethod
+    def from_frame(cls, frame_id: int, data: Union[bytes, memoryview]) -> 'Message':
+        """
+        :param frame_id: id in the frame header, with the closed flag
+        """
+        return cls(id=frame_id & ~_closed_flag, data=data, closed=bool(frame_id & _closed_flag))
+
     @classmethod
     def decode(cls, body: bytes) -> 'Message':
-        id = bytes_to_int(body[:4])
-        res = cls(data=body[4:], id=id)
-        return res
+        return cls.from_frame(bytes_to_int(body[:4]), body[4:])
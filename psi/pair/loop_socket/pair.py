@@ -19,14 +19,33 @@ class LoopSocketPair(Pair):
 
         self._loop = Loop(local, peer)
         self._id, self._pipe = self._loop.register(3 * timeout)
+        self._closed = False
 
     def send(self, data: bytes):
         msg = Message(data=data, id=self._id)
         self._pipe.send(msg, block=False)
 
-    def recv(self) -> bytes:
+    def _recv(self) -> Message:
+        if self._closed:
+            raise ConnectionError("pair is closed")
         msg = self._pipe.recv(block=True, timeout=self._timeout)
-        return msg.data
+        if msg.closed:
+            # closed by the peer pair, by this pair in another thread, or the connection is closed
+            self._closed = True
+            raise ConnectionError("pair is closed")
+        return msg
+
+    def recv(self) -> bytes:
+        return bytes(self._recv().data)
+
+    def recv_into(self, buffer) -> int:
+        # data of large frames is a memoryview of the received frame, so it is copied only once into buffer
+        data = self._recv().data
+        view = memoryview(buffer).cast("B")
+        if len(data) > len(view):
+            raise ValueError(f"buffer size {len(view)} is smaller than message length {len(data)}")
+        view[:len(data)] = data
+        return len(data)
 
     def barrier(self):
         self.send("barrier".encode("utf-8"))
@@ -35,4 +54,9 @@ class LoopSocketPair(Pair):
         assert msg == "barrier"
 
     def close(self):
-        self._loop.unregister(self._id)
+        """
+        close the pair, recv of the peer pair fails after it receives the messages sent before
+        """
+        if not self._closed:
+            self._closed = True
+            self._pipe.send(Message(id=self._id, data=b"", closed=True), block=False)
@@ -19,6 +19,20 @@ class Pair(abc.ABC):
     def recv(self) -> bytes:
         ...
 
+    def recv_into(self, buffer) -> int:
+        """
+        receive one message and write it into buffer
+
+        :param buffer: writable buffer, should be large enough for the message
+        :return: message length
+        """
+        data = self.recv()
+        view = memoryview(buffer).cast("B")
+        if len(data) > len(view):
+            raise ValueError(f"buffer size {len(view)} is smaller than message length {len(data)}")
+        view[:len(data)] = data
+        return len(data)
+
     @abc.abstractmethod
     def close(self):
         ...
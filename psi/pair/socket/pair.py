@@ -6,10 +6,13 @@ import time
 from typing import Union, Tuple, Optional
 
 from ..pair import Pair, Address
+from ..waker import Waker
 from ...serialize import int_to_bytes, bytes_to_int
 
 AddrType = Union[Address, Tuple[str, int]]
 
+_probe_wait = 0.1  # seconds to wait for the probe of a peer connecting at the same time
+
 
 class _ServerThread(threading.Thread):
     def __init__(self, local: AddrType, peer: AddrType):
@@ -27,21 +30,36 @@ class _ServerThread(threading.Thread):
         self._sock.listen(10)
 
         self._sel = selectors.DefaultSelector()
-        self._sel.register(self._sock, selectors.EVENT_READ)
+        self._sel.register(self._sock, selectors.EVENT_READ, data="server")
+        # wakes up the thread blocked in select when it is terminated
+        self._waker = Waker()
+        self._sel.register(self._waker, selectors.EVENT_READ, data="wakeup")
 
     def run(self):
-        while not self._stop_event.is_set():
-            events = self._sel.select(0)
-            if len(events) > 0:
-                sock, addr = self._sock.accept()
-                if addr[0] == self._peer[0]:
-                    self._res_queue.put((sock, addr))
-                else:
-                    sock.close()
+        try:
+            while not self._stop_event.is_set():
+                for key, _ in self._sel.select():
+                    if key.data != "server" or self._stop_event.is_set():
+                        continue
+                    try:
+                        sock, addr = self._sock.accept()
+                    except BlockingIOError:
+                        continue
+                    if addr[0] == self._peer[0]:
+                        self._res_queue.put((sock, addr))
+                    else:
+                        sock.close()
+        finally:
+            self._sel.close()
+            self._sock.close()
+            self._waker.close()
 
     def terminate(self):
+        """
+        stop accepting, the listening socket is closed by the thread, so it is closed once the thread is joined
+        """
         self._stop_event.set()
-        self._sock.close()
+        self._waker.wake()
 
     def get_sock_addr(
         self, block: bool = True, timeout: Optional[float] = None
@@ -74,10 +92,13 @@ class SocketPair(Pair):
         try:
             client_sock.connect(self._peer)
             try:
-                peer_sock, _ = server_thread.get_sock_addr(block=False)
+                # a peer connecting at the same time sends its probe at about the same time as ours,
+                # wait a moment for the server thread to accept it, it blocks in select instead of polling
+                peer_sock, _ = server_thread.get_sock_addr(timeout=_probe_wait)
                 client_sock.send(str(ts).encode("utf-8"))
                 peer_ts = int(peer_sock.recv(1024).decode("utf-8"))
-                if ts < peer_ts:
+                # both sides may start in the same millisecond, ports break the tie in the same way on both sides
+                if (ts, self._local.port) < (peer_ts, self._peer.port):
                     raise ConnectionRefusedError
                 else:
                     raise queue.Empty
@@ -115,17 +136,28 @@ class SocketPair(Pair):
         data = self._recv(length)
         return data
 
+    def recv_into(self, buffer) -> int:
+        length = bytes_to_int(self._recv(4))
+        view = memoryview(buffer).cast("B")
+        if length > len(view):
+            raise ValueError(f"buffer size {len(view)} is smaller than message length {length}")
+        self._recv_exact(view[:length])
+        return length
+
     def _recv(self, count: int) -> bytes:
         buffer = bytearray(count)
-        view = memoryview(buffer)
+        self._recv_exact(memoryview(buffer))
+        return bytes(buffer)
 
+    def _recv_exact(self, view: memoryview):
+        count = len(view)
         while count > 0:
             n = self._sock.recv_into(view, count)
+            if n == 0:
+                raise ConnectionError("connection closed by peer")
             view = view[n:]
             count -= n
 
-        return bytes(buffer)
-
     def barrier(self):
         self.send(b"barrier")
         msg = self.recv()
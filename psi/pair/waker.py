@@ -0,0 +1,38 @@
+import socket
+
+__all__ = ["Waker"]
+
+
+class Waker(object):
+    """
+    wake up a thread blocked in a selector from another thread, register it for EVENT_READ in the selector
+    """
+
+    def __init__(self):
+        self._reader, self._writer = socket.socketpair()
+        self._reader.setblocking(False)
+        self._writer.setblocking(False)
+
+    def fileno(self) -> int:
+        return self._reader.fileno()
+
+    def wake(self):
+        try:
+            self._writer.send(b"x")
+        except BlockingIOError:
+            # the buffer is full of pending wakeups, the selector will wake up anyway
+            pass
+
+    def clear(self):
+        """
+        consume pending wakeups, call it when the selector reports the waker
+        """
+        try:
+            while self._reader.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        self._reader.close()
+        self._writer.close()
@@ -1,2 +1,5 @@
 from .client import Client
 from .server import Server
+from .bucket import BucketClient, BucketServer
+from .shard import ShardedClient, ShardedServer
+from .aio import AsyncClient, AsyncServer
@@ -0,0 +1,189 @@
+from concurrent.futures import Executor
+from typing import AsyncIterator, List, Optional
+
+import numpy as np
+
+from .client import Client
+from .filter import make_filter, _params_msg, _load_filter
+from .match import ValueSet
+from .server import Server
+from ..oprf import AsyncClient as AsyncOprfClient, AsyncServer as AsyncOprfServer
+from ..pair import AsyncPair, async_send_array, async_send_array_chunks, async_recv_array, async_recv_array_chunks
+from ..utils import pack_list, unpack_list, run_in_executor, iterate_in_executor
+
+__all__ = ["async_send_filter", "async_recv_filter", "AsyncClient", "AsyncServer"]
+
+
+async def async_send_filter(pair: AsyncPair, f):
+    """
+    coroutine version of send_filter
+    """
+    await pair.send(_params_msg(f))
+    await async_send_array(pair, f.data.reshape(-1, 1))
+
+
+async def async_recv_filter(pair: AsyncPair, name: str):
+    """
+    coroutine version of recv_filter
+    """
+    params_msg = await pair.recv()
+    return _load_filter(name, params_msg, await async_recv_array(pair))
+
+
+class AsyncClient(Client):
+    """
+    psi client with coroutine prepare and intersect stages, cpu heavy batches run in the executor,
+    so one event loop can drive many sessions. words are hashed into the cuckoo table in prepare stage,
+    in the executor too.
+    """
+
+    def __init__(self, pair: AsyncPair, words: List[bytes], executor: Optional[Executor] = None, **kwargs):
+        """
+        :param executor: executor of the cpu heavy batches, the default executor of the running loop if it is None
+        :param kwargs: parameters of Client
+        """
+        super(AsyncClient, self).__init__(pair, words, **kwargs)
+        self.executor = executor
+
+    async def prepare(self):
+        await run_in_executor(self.executor, self._build_table)
+        codewords, output_length, msg = self._handshake(await self.pair.recv())
+        await self.pair.send(msg)
+
+        self.oprf_client = AsyncOprfClient(
+            self.pair, self.dummy_table, codewords, self.curve, output_length, self.executor
+        )
+        await self.oprf_client.prepare()
+
+    async def _async_match(self, local_vals: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """
+        coroutine version of _match, in pipeline mode every chunk of peer values is searched as soon as it arrives
+        """
+        if self.filter_type is not None:
+            f = await async_recv_filter(self.pair, self.filter_type)
+            found = await run_in_executor(self.executor, f.contains, local_vals[positions])
+            return positions[found]
+        elif self.pipeline:
+            local_set = await run_in_executor(self.executor, ValueSet, local_vals[positions])
+            # a position is matched once even if the peer values have duplicates
+            matched = np.zeros(positions.size, dtype=bool)
+            async for chunk in async_recv_array_chunks(self.pair):
+                found = await run_in_executor(self.executor, local_set.find, chunk)
+                matched[found[found >= 0]] = True
+            return positions[matched]
+        else:
+            peer_set = await run_in_executor(self.executor, ValueSet, await async_recv_array(self.pair))
+            return positions[await run_in_executor(self.executor, peer_set.contains, local_vals[positions])]
+
+    async def iter_intersect(self) -> AsyncIterator[bytes]:
+        """
+        coroutine version of Client.iter_intersect, the iterator should be consumed to the end
+        """
+        local_vals = await run_in_executor(self.executor, self.oprf_client.eval_all)
+        for positions in await run_in_executor(self.executor, self._groups, local_vals):
+            keys = self._words(await self._async_match(local_vals, positions))
+            for start in range(0, len(keys), self._batch_size):
+                await self.pair.send(pack_list(keys[start: start + self._batch_size]))
+            for key in keys:
+                yield key
+        # an empty batch marks the end of the matches
+        await self.pair.send(pack_list([]))
+
+    async def intersect(self) -> List[bytes]:
+        return [key async for key in self.iter_intersect()]
+
+
+class AsyncServer(Server):
+    """
+    psi server with coroutine prepare and intersect stages, cpu heavy batches run in the executor,
+    so one event loop can drive many sessions
+    """
+
+    def __init__(self, pair: AsyncPair, words: List[bytes], executor: Optional[Executor] = None, **kwargs):
+        """
+        :param executor: executor of the cpu heavy batches, the default executor of the running loop if it is None
+        :param kwargs: parameters of Server, workers should be 1
+        """
+        super(AsyncServer, self).__init__(pair, words, **kwargs)
+        if self.workers > 1:
+            # a process pool of every session would start workers * sessions processes,
+            # concurrent sessions share the executor instead
+            raise ValueError(f"workers {self.workers} is not supported by AsyncServer, it should be 1")
+        self.executor = executor
+
+    async def prepare(self):
+        await self.pair.send(self._handshake())
+        codewords, output_length = self._accept(await self.pair.recv())
+
+        self.oprf_server = AsyncOprfServer(self.pair, codewords, self.curve, output_length, self.executor)
+        await self.oprf_server.prepare()
+        self._check_oprf()
+
+    async def _async_send_vals(self, count: int, chunks: AsyncIterator[np.ndarray]):
+        output_length = self.oprf_server.output_length
+        if self.filter_type is None:
+            # the next chunk is evaluated in the executor while the transport sends this one
+            await async_send_array_chunks(self.pair, count, output_length, chunks)
+        else:
+            vals = np.concatenate([np.empty((0, output_length), np.uint8), *[chunk async for chunk in chunks]])
+            f = await run_in_executor(self.executor, make_filter, self.filter_type, vals, self.fp_rate)
+            await async_send_filter(self.pair, f)
+
+    async def iter_intersect(self) -> AsyncIterator[bytes]:
+        """
+        coroutine version of Server.iter_intersect, the iterator should be consumed to the end
+        """
+        for count, chunks in await run_in_executor(self.executor, self._tables, None):
+            await self._async_send_vals(count, iterate_in_executor(chunks, self.executor))
+
+        while True:
+            words = unpack_list(await self.pair.recv())
+            # an empty batch marks the end of the matches
+            if not words:
+                break
+            for word in words:
+                yield word
+
+    async def intersect(self) -> List[bytes]:
+        return [word async for word in self.iter_intersect()]
+
+
+if __name__ == '__main__':
+    import asyncio
+    import time
+
+    from ..pair import connect_pair, serve_pairs
+
+    size = 1000
+    port = 12500
+    server_words = [str(i).encode("utf-8") for i in range(size)]
+    client_words = [str(i).encode("utf-8") for i in range(size // 2, size + size // 2)]
+
+    async def serve(pair: AsyncPair, results: asyncio.Queue):
+        async with pair:
+            server = AsyncServer(pair, server_words)
+            await server.prepare()
+            res = await server.intersect()
+        await results.put(res)
+
+    async def run_client() -> List[bytes]:
+        # sessions queue for the executor, so a message may wait longer than a fixed timeout
+        async with await connect_pair("127.0.0.1", port, timeout=None) as pair:
+            client = AsyncClient(pair, client_words)
+            await client.prepare()
+            return await client.intersect()
+
+    async def run(sessions: int) -> float:
+        server_results = asyncio.Queue()
+        listener = await serve_pairs(lambda pair: serve(pair, server_results), "127.0.0.1", port, timeout=None)
+        start = time.time()
+        results = await asyncio.gather(*[run_client() for _ in range(sessions)])
+        results.extend([await server_results.get() for _ in range(sessions)])
+        cost = time.time() - start
+        listener.close()
+        await listener.wait_closed()
+        assert all(len(res) == size // 2 for res in results)
+        return cost
+
+    for sessions in [1, 10, 100]:
+        print(f"{sessions} concurrent sessions of {size} words in one event loop: {asyncio.run(run(sessions)):.3f}s")
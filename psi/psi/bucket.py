@@ -0,0 +1,232 @@
+import hashlib
+import math
+import os
+import secrets
+import tempfile
+from typing import Iterable, Iterator, List, Optional
+
+from .client import Client
+from .server import Server
+from ..pair import Pair
+from ..serialize import int_to_bytes, bytes_to_int
+from ..utils import write_records, read_records
+
+__all__ = [
+    "bucket_index", "bucket_count", "bucket_capacity", "pad_bucket", "Buckets", "BucketClient", "BucketServer"
+]
+
+_item_memory = 1024  # estimated peak memory of one item in the psi of a bucket, in bytes
+_dummy_length = 32  # random dummy items padding the buckets never match
+_max_buckets = 1 << 10  # items are partitioned on disk once into this many fine buckets
+
+
+def bucket_index(item: bytes, count: int) -> int:
+    """
+    bucket of the item in count buckets, by a public hash shared by both parties, independent of the cuckoo hashes
+    """
+    digest = hashlib.blake2b(item, digest_size=8, person=b"psi bucket").digest()
+    return int.from_bytes(digest, "big") % count
+
+
+def bucket_count(n: int, memory: int) -> int:
+    """
+    :param n: item count
+    :param memory: peak memory of the psi of one bucket, in bytes
+    :return: bucket count which keeps the psi of every bucket in memory, a power of 2 no more than _max_buckets
+    """
+    count = max(math.ceil(n * _item_memory / memory), 1)
+    if count > _max_buckets:
+        raise ValueError(
+            f"{n} items need {count} buckets of {memory} bytes, more than the max bucket count {_max_buckets}, "
+            f"memory should be at least {math.ceil(n * _item_memory / _max_buckets)} bytes"
+        )
+    return 1 << (count - 1).bit_length()
+
+
+def bucket_capacity(n: int, buckets: int, stat_security: int = 40) -> int:
+    """
+    every bucket is padded to the same capacity, so bucket sizes reveal nothing but n.
+    the capacity bounds the size of all buckets except with probability 2^-stat_security (Bernstein inequality)
+
+    :param n: item count
+    :param buckets: bucket count
+    """
+    if buckets == 1:
+        return n
+    mean = n / buckets
+    t = (stat_security + math.log2(buckets)) * math.log(2)
+    return math.ceil(mean + t / 3 + math.sqrt(t * t / 9 + 2 * mean * t))
+
+
+def pad_bucket(items: List[bytes], capacity: int) -> List[bytes]:
+    """
+    pad the distinct items of a bucket with random dummy items to capacity
+    """
+    if len(items) > capacity:
+        raise ValueError(f"bucket size {len(items)} is greater than bucket capacity {capacity}")
+    return items + [secrets.token_bytes(_dummy_length) for _ in range(capacity - len(items))]
+
+
+class Buckets(object):
+    """
+    items partitioned by a public hash into on-disk bucket files, the files are removed when the buckets are closed.
+    items are written once into _max_buckets fine buckets, bucket i of count buckets is the union of
+    the fine buckets j with j mod count == i, so any power of 2 bucket count is loaded without partitioning again.
+    """
+
+    def __init__(self, chunks: Iterable[List[bytes]], directory: Optional[str] = None):
+        """
+        :param chunks: item lists, such as loader.iter_items
+        :param directory: parent directory of the bucket files, the system temporary directory if it is None
+        """
+        self._dir = tempfile.TemporaryDirectory(dir=directory)
+        self._sizes = [0] * _max_buckets
+        for chunk in chunks:
+            groups: List[List[bytes]] = [[] for _ in range(_max_buckets)]
+            for item in chunk:
+                groups[bucket_index(item, _max_buckets)].append(item)
+            # only one bucket file is open at once, so the bucket count is not limited by open files
+            for j, group in enumerate(groups):
+                if group:
+                    with open(self._path(j), mode="ab") as f:
+                        write_records(f, group)
+                    self._sizes[j] += len(group)
+        # duplicates are removed from every fine bucket, so the sizes, and the capacities from them,
+        # count distinct items. a fine bucket is much smaller than a bucket, so it fits in memory
+        for j in range(_max_buckets):
+            if self._sizes[j] > 0:
+                with open(self._path(j), mode="rb") as f:
+                    items = list(dict.fromkeys(read_records(f)))
+                with open(self._path(j), mode="wb") as f:
+                    write_records(f, items)
+                self._sizes[j] = len(items)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _path(self, j: int) -> str:
+        return os.path.join(self._dir.name, f"{j}.bucket")
+
+    @property
+    def size(self) -> int:
+        """
+        distinct item count
+        """
+        return sum(self._sizes)
+
+    def load(self, i: int, count: int, capacity: int) -> List[bytes]:
+        """
+        load the distinct items of bucket i of count buckets, padded with random dummy items to capacity
+
+        :param count: bucket count, a power of 2 no more than _max_buckets
+        """
+        if _max_buckets % count != 0:
+            raise ValueError(f"bucket count {count} should be a power of 2 no more than {_max_buckets}")
+        # an item is in one fine bucket only, and fine buckets have no duplicates
+        items = []
+        for j in range(i, _max_buckets, count):
+            if self._sizes[j] > 0:
+                with open(self._path(j), mode="rb") as f:
+                    items.extend(read_records(f))
+        return pad_bucket(items, capacity)
+
+    def close(self):
+        self._dir.cleanup()
+
+
+class BucketClient(object):
+    """
+    psi client of partitioned inputs, an independent psi is run for every bucket,
+    so memory is bounded by the size of one bucket
+    """
+
+    def __init__(
+        self, pair: Pair, chunks: Iterable[List[bytes]], memory: int, directory: Optional[str] = None, **kwargs
+    ):
+        """
+        :param chunks: item lists, such as loader.iter_items
+        :param memory: peak memory of the psi of one bucket, in bytes
+        :param directory: parent directory of the bucket files
+        :param kwargs: parameters of Client
+        """
+        self.pair = pair
+        self.chunks = chunks
+        self.memory = memory
+        self.directory = directory
+        self.stat_security = kwargs.get("stat_security", 40)
+        self.kwargs = kwargs
+        self.buckets: Optional[Buckets] = None
+        self.count = 0  # bucket count agreed with the peer
+
+    def prepare(self):
+        """
+        partition the input and agree the bucket count with the server,
+        the psi of every bucket is prepared in iter_intersect
+        """
+        self.buckets = Buckets(self.chunks, self.directory)
+        # the server sends the bucket count it needs, and the client replies the agreed bucket count
+        peer_count = bytes_to_int(self.pair.recv())
+        self.count = max(bucket_count(self.buckets.size, self.memory), peer_count)
+        self.pair.send(int_to_bytes(self.count))
+
+    def iter_intersect(self) -> Iterator[bytes]:
+        capacity = bucket_capacity(self.buckets.size, self.count, self.stat_security)
+        try:
+            for i in range(self.count):
+                client = Client(self.pair, self.buckets.load(i, self.count, capacity), **self.kwargs)
+                client.prepare()
+                yield from client.iter_intersect()
+        finally:
+            self.buckets.close()
+
+    def intersect(self) -> List[bytes]:
+        return list(self.iter_intersect())
+
+
+class BucketServer(object):
+    """
+    psi server of partitioned inputs, see BucketClient
+    """
+
+    def __init__(
+        self, pair: Pair, chunks: Iterable[List[bytes]], memory: int, directory: Optional[str] = None, **kwargs
+    ):
+        """
+        :param chunks: item lists, such as loader.iter_items
+        :param memory: peak memory of the psi of one bucket, in bytes
+        :param directory: parent directory of the bucket files
+        :param kwargs: parameters of Server
+        """
+        self.pair = pair
+        self.chunks = chunks
+        self.memory = memory
+        self.directory = directory
+        self.stat_security = kwargs.get("stat_security", 40)
+        self.kwargs = kwargs
+        self.buckets: Optional[Buckets] = None
+        self.count = 0  # bucket count agreed with the peer
+
+    def prepare(self):
+        """
+        partition the input and agree the bucket count with the client,
+        the psi of every bucket is prepared in iter_intersect
+        """
+        self.buckets = Buckets(self.chunks, self.directory)
+        self.pair.send(int_to_bytes(bucket_count(self.buckets.size, self.memory)))
+        self.count = bytes_to_int(self.pair.recv())
+
+    def iter_intersect(self) -> Iterator[bytes]:
+        capacity = bucket_capacity(self.buckets.size, self.count, self.stat_security)
+        try:
+            for i in range(self.count):
+                server = Server(self.pair, self.buckets.load(i, self.count, capacity), **self.kwargs)
+                server.prepare()
+                yield from server.iter_intersect()
+        finally:
+            self.buckets.close()
+
+    def intersect(self) -> List[bytes]:
+        return list(self.iter_intersect())
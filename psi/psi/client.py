@@ -1,21 +1,62 @@
 import logging
 import random
-from typing import List
+from typing import Iterator, List, Optional, Tuple
 
-from .cuckoo import CuckooHashTable
+import numpy as np
+
+from .cuckoo import CuckooHashTable, build_table
+from .filter import filter_types, recv_filter
+from .match import ValueSet
+from .params import select_cuckoo_params, select_codewords, select_output_length
 from ..oprf import Client as OprfClient
-from ..pair import Pair
+from ..pair import Pair, recv_array, recv_array_chunks
+from ..serialize import int_to_bytes, bytes_to_int
+from ..utils import pack_list, unpack_list, prefetch
 
 _logger = logging.getLogger()
 
 
 class Client(object):
-    def __init__(self, pair: Pair, words: List[bytes]):
-        self.n = int(1.2 * len(words))
-        s = 5
-        cuckoo = CuckooHashTable(self.n, s)
-        for word in words:
-            cuckoo.update(word)
+    _batch_size: int = 1 << 16  # max matched words sent in one message
+
+    def __init__(
+        self,
+        pair: Pair,
+        words: List[bytes],
+        curve: str = "secp256r1",
+        stat_security: int = 40,
+        output_length: Optional[int] = None,
+        pipeline: bool = False,
+    ):
+        if output_length is not None and not 0 < output_length <= 32:
+            raise ValueError(f"oprf output length {output_length} should be in range (0, 32]")
+        self.curve = curve
+        self.stat_security = stat_security
+        self.output_length = output_length  # oprf output length, minimum safe length if it is None
+        # receive peer values in a background thread and match every chunk as it arrives
+        self.pipeline = pipeline
+        self.params = select_cuckoo_params(len(words), stat_security=stat_security)
+        self.n = self.params.table_size(len(words))
+        self.words = words
+        # cuckoo hash table of the words, built in prepare stage, so the constructor is cheap
+        self.cuckoo: Optional[CuckooHashTable] = None
+        self.seed = b""
+        self.table: List[Optional[bytes]] = []
+        self.stash: List[Optional[bytes]] = []
+        self.table_hash_index: List[int] = []
+        self.dummy_table: List[bytes] = []  # oprf inputs of all table positions, random for empty positions
+
+        self.pair = pair
+        self.filter_type: Optional[str] = None  # filter type chosen by the server, None means plain arrays
+        self.oprf_client: Optional[OprfClient] = None
+
+    def _build_table(self):
+        """
+        hash the words into the cuckoo hash table, and make the oprf inputs of the table positions
+        """
+        cuckoo = build_table(self.words, self.n, self.params.stash_size, self.params.hash_count)
+        self.cuckoo = cuckoo
+        self.seed = cuckoo.seed
         self.table = cuckoo.table
         self.stash = cuckoo.stash
         self.table_hash_index = cuckoo.table_hash_index
@@ -31,46 +72,119 @@ class Client(object):
             if key is None:
                 key = random.getrandbits(64).to_bytes(8, "big")
             dummy_table.append(key)
-
-        self.pair = pair
-        self.oprf_client = OprfClient(pair, dummy_table, 512)
+        self.dummy_table = dummy_table
 
     def prepare(self):
+        self._build_table()
+        codewords, output_length, msg = self._handshake(self.pair.recv())
+        self.pair.send(msg)
+
+        self.oprf_client = OprfClient(self.pair, self.dummy_table, codewords, self.curve, output_length)
         self.oprf_client.prepare()
 
+    def _handshake(self, msg: bytes) -> Tuple[int, int, bytes]:
+        """
+        handshake, the server sends its set size, statistical security parameter and filter type,
+        and the client replies cuckoo hashing parameters, codewords length and oprf output length
+
+        :param msg: handshake message of the server
+        :return: codewords length, oprf output length, and the reply message
+        """
+        peer_n_bytes, peer_stat_security_bytes, filter_type_bytes = unpack_list(msg)
+        self.filter_type = filter_type_bytes.decode("utf-8") or None
+        if self.filter_type is not None and self.filter_type not in filter_types:
+            raise ValueError(f"unknown filter type {self.filter_type}, it should be one of {', '.join(filter_types)}")
+        peer_n = bytes_to_int(peer_n_bytes)
+        stat_security = max(self.stat_security, bytes_to_int(peer_stat_security_bytes))
+        server_count = (self.params.hash_count + self.params.stash_size) * peer_n
+        codewords = select_codewords(server_count, stat_security)
+        output_length = select_output_length(server_count, len(self.dummy_table), stat_security)
+        if self.output_length is not None:
+            output_length = max(output_length, self.output_length)
+        if self.filter_type is not None:
+            # filter keys are mixed from the first 16 bytes of every value, and at least 8 bytes are required
+            output_length = max(output_length, 8)
+        msg = pack_list([
+            int_to_bytes(self.n),
+            int_to_bytes(self.params.hash_count),
+            int_to_bytes(self.params.stash_size),
+            self.seed,
+            int_to_bytes(codewords),
+            int_to_bytes(output_length),
+        ])
+        return codewords, output_length, msg
+
+    def _match(self, local_vals: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """
+        receive the peer values of a hash index or the stash, and match the local values of the table positions
+
+        :param local_vals: oprf outputs of all table positions
+        :param positions: table positions evaluated with the hash index or the stash
+        :return: matched table positions
+        """
+        if self.filter_type is not None:
+            return positions[recv_filter(self.pair, self.filter_type).contains(local_vals[positions])]
+        elif self.pipeline:
+            # the local values are usually fewer than the peer values, so they are sorted instead,
+            # and every received chunk of peer values is searched in them
+            local_set = ValueSet(local_vals[positions])
+            # a position is matched once even if the peer values have duplicates
+            matched = np.zeros(positions.size, dtype=bool)
+            for chunk in prefetch(recv_array_chunks(self.pair)):
+                found = local_set.find(chunk)
+                matched[found[found >= 0]] = True
+            return positions[matched]
+        else:
+            return positions[ValueSet(recv_array(self.pair)).contains(local_vals[positions])]
+
+    def iter_intersect(self) -> Iterator[bytes]:
+        """
+        intersect stage, matched words are yielded as soon as the peer values of their hash index are matched,
+        and they are sent to the server in the same time. the iterator should be consumed to the end.
+        """
+        local_vals = self.oprf_client.eval_all()
+        # every peer table is matched as soon as it arrives, so only one of them is held in memory
+        for positions in self._groups(local_vals):
+            keys = self._words(self._match(local_vals, positions))
+            for start in range(0, len(keys), self._batch_size):
+                self.pair.send(pack_list(keys[start: start + self._batch_size]))
+            yield from keys
+        # an empty batch marks the end of the matches
+        self.pair.send(pack_list([]))
+
+    def _word_index(self) -> np.ndarray:
+        """
+        :return: word index of every table position, -1 means the position is empty
+        """
+        return np.concatenate([self.cuckoo.table_index, self.cuckoo.stash_index])
+
+    def _groups(self, local_vals: np.ndarray) -> List[np.ndarray]:
+        """
+        :param local_vals: oprf outputs of all table positions
+        :return: table positions of every hash index and the stash, in the order the peer sends their values
+        """
+        if _logger.isEnabledFor(logging.DEBUG):
+            words = self.cuckoo.words
+            word_index = self._word_index()
+            for i in np.nonzero(word_index >= 0)[0].tolist():
+                key = words[word_index[i]]
+                _logger.debug(
+                    f"table position {i}, word {int.from_bytes(key, 'big')}, val {local_vals[i].tobytes().hex()}"
+                )
+
+        hash_indices = self.cuckoo.hash_indices
+        groups = [np.nonzero(hash_indices == hash_index)[0] for hash_index in range(1, self.params.hash_count + 1)]
+        # the stash size is fixed at setup, nothing is sent for the stash if it is empty
+        if self.params.stash_size > 0:
+            groups.append(np.nonzero(self.cuckoo.stash_index >= 0)[0] + self.n)
+        return groups
+
+    def _words(self, positions: np.ndarray) -> List[bytes]:
+        """
+        :return: words at table positions
+        """
+        words = self.cuckoo.words
+        return [words[i] for i in self._word_index()[positions].tolist()]
+
     def intersect(self) -> List[bytes]:
-        peer_tables = [{}, {}, {}]
-        peer_stash = {}
-        for table in peer_tables:
-            while True:
-                key = self.pair.recv()
-                if key == b"end":
-                    break
-                table[key] = None
-        while True:
-            key = self.pair.recv()
-            if key == b"end":
-                break
-            peer_stash[key] = None
-
-        res = []
-        for i, (key, hash_index) in enumerate(zip(self.table, self.table_hash_index)):
-            if key is not None:
-                peer_table = peer_tables[hash_index - 1]
-                local_val = self.oprf_client.eval(i)
-                _logger.debug(f"hash index {hash_index}, table position {i}, "
-                             f"word {int.from_bytes(key, 'big')}, val {local_val.hex()}")
-                if local_val in peer_table:
-                    res.append(key)
-                    self.pair.send(key)
-
-        for i, key in enumerate(self.stash):
-            if key is not None:
-                local_val = self.oprf_client.eval(i + self.n)
-                _logger.debug(f"table position {i + self.n}, "
-                             f"word {int.from_bytes(key, 'big')}, val {local_val.hex()}")
-                if local_val in peer_stash:
-                    res.append(key)
-                    self.pair.send(key)
-        self.pair.send(b"end")
-        return res
+        return list(self.iter_intersect())
@@ -1,61 +1,148 @@
 import hashlib
-import random
-from typing import Optional, List
+import secrets
+from typing import Optional, List, Sequence
 
+import numpy as np
 
-def position_hash(i: int, data: bytes, n: int) -> int:
-    length = (n.bit_length() + 7) // 8
-    h = hashlib.sha256(bytes([i]) + data).digest()[:length]
-    val = int.from_bytes(h, "big")
-    return val % n
+
+def position_hash(i: int, data: bytes, n: int, seed: bytes = b"") -> int:
+    return int(position_hashes([data], n, i, seed)[i - 1, 0])
+
+
+def position_hashes(data: Sequence[bytes], n: int, count: int = 3, seed: bytes = b"") -> np.ndarray:
+    """
+    all positions of a word come from one SHA512 digest of seed + word, position of hash index i (1 based)
+    is the (i - 1)th 8 bytes of the digest modulo n, so that count should be less equal than 8
+
+    :return: 2-d int64 array, shape: count * len(data), element (i, j) is position_hash(i + 1, data[j], n)
+    """
+    if count > 8:
+        raise ValueError(f"hash count {count} is too large, it should be less equal than 8")
+    length = 8 * count
+    buffer = b"".join(hashlib.sha512(seed + item).digest()[:length] for item in data)
+    vals = np.frombuffer(buffer, dtype=">u8").reshape((len(data), count)).T.astype(np.uint64)
+    return (vals % np.uint64(n)).astype(np.int64)
 
 
 class CuckooHashTable(object):
-    def __init__(self, n: int, s: int):
+    def __init__(self, n: int, s: int, hash_count: int = 3, seed: bytes = b""):
         self._n = n
         self._s = s
+        self._hash_count = hash_count
+        self._seed = seed
 
-        self._table: List[Optional[bytes]] = self._n * [None]
-        self._table_hash_index: List[int] = self._n * [0]
-        self._stash: List[Optional[bytes]] = self._s * [None]
+        self._words: List[bytes] = []
+        self._positions = np.empty((hash_count, 0), dtype=np.int64)  # candidate positions of every word, grows on demand
+        self._table_index = np.full(self._n, -1, dtype=np.int32)  # index of word in each position, -1 is empty
+        self._table_hash_index = np.zeros(self._n, dtype=np.uint8)
+        self._stash_index = np.full(self._s, -1, dtype=np.int32)
         self._stash_count = 0
 
         self._max_depth = 500
+        self._rng = np.random.default_rng()
 
     def update(self, data: bytes):
+        self.build([data])
+
+    def build(self, words: Sequence[bytes]):
+        """
+        insert many words, all candidate positions of the words are computed once,
+        and the eviction loop runs over all words which are not placed at the same time
+        """
+        start = len(self._words)
+        self._words.extend(words)
+        if self._positions.shape[1] < len(self._words):
+            positions = np.empty((self._hash_count, max(len(self._words), 2 * self._positions.shape[1])), dtype=np.int64)
+            positions[:, :start] = self._positions[:, :start]
+            self._positions = positions
+        self._positions[:, start: len(self._words)] = position_hashes(words, self._n, self._hash_count, self._seed)
+
+        table_index = self._table_index
+        table_hash_index = self._table_hash_index
+        rest = np.arange(start, len(self._words), dtype=np.int32)
         for _ in range(self._max_depth):
-            h1 = position_hash(1, data, self._n)
-            if self._table[h1] is None:
-                self._table[h1] = data
-                self._table_hash_index[h1] = 1
-                return
-            h2 = position_hash(2, data, self._n)
-            if self._table[h2] is None:
-                self._table[h2] = data
-                self._table_hash_index[h2] = 2
-                return
-            h3 = position_hash(3, data, self._n)
-            if self._table[h3] is None:
-                self._table[h3] = data
-                self._table_hash_index[h3] = 3
-                return
-            i = random.randrange(3)
-            h = [h1, h2, h3][i]
-            old_data = self._table[h]
-            self._table[h] = data
-            self._table_hash_index[h] = i + 1
-            data = old_data
-        self._stash[self._stash_count] = data
-        self._stash_count += 1
+            # place words whose candidate position is empty, the first word wins if several words want the same one
+            for i in range(self._hash_count):
+                positions = self._positions[i, rest]
+                empty = table_index[positions] < 0
+                positions, first = np.unique(positions[empty], return_index=True)
+                placed = rest[empty][first]
+                table_index[positions] = placed
+                table_hash_index[positions] = i + 1
+                rest = np.setdiff1d(rest, placed, assume_unique=True)
+            if rest.size == 0:
+                break
+
+            # every remaining word evicts the word in a random candidate position
+            choices = self._rng.integers(0, self._hash_count, size=rest.size)
+            positions, first = np.unique(self._positions[choices, rest], return_index=True)
+            placed = rest[first]
+            evicted = table_index[positions]
+            table_index[positions] = placed
+            table_hash_index[positions] = choices[first] + 1
+            rest = np.concatenate([np.setdiff1d(rest, placed, assume_unique=True), evicted[evicted >= 0]])
+
+        if self._stash_count + rest.size > self._s:
+            raise IndexError(f"cuckoo hash table stash overflow, stash size is {self._s}")
+        self._stash_index[self._stash_count: self._stash_count + rest.size] = rest
+        self._stash_count += rest.size
 
     @property
     def table(self) -> List[Optional[bytes]]:
-        return self._table
+        return [self._words[i] if i >= 0 else None for i in self._table_index.tolist()]
 
     @property
     def stash(self) -> List[Optional[bytes]]:
-        return self._stash
+        return [self._words[i] if i >= 0 else None for i in self._stash_index.tolist()]
 
     @property
     def table_hash_index(self) -> List[int]:
+        return self._table_hash_index.tolist()
+
+    @property
+    def hash_indices(self) -> np.ndarray:
+        """
+        1-based index of the hash function that placed the word in each table position, 0 means the position is empty
+        """
         return self._table_hash_index
+
+    @property
+    def table_index(self) -> np.ndarray:
+        """
+        index of the word in each table position, -1 means the position is empty
+        """
+        return self._table_index
+
+    @property
+    def stash_index(self) -> np.ndarray:
+        return self._stash_index
+
+    @property
+    def words(self) -> List[bytes]:
+        return self._words
+
+    @property
+    def seed(self) -> bytes:
+        return self._seed
+
+    @property
+    def hash_count(self) -> int:
+        return self._hash_count
+
+
+def build_table(
+    words: Sequence[bytes], n: int, s: int, hash_count: int = 3, retries: int = 16
+) -> CuckooHashTable:
+    """
+    build a cuckoo hash table with a random hash seed, retry with a new seed if the stash overflows.
+    the seed is sent to the server, and a retried seed reveals that the client items overflow the first one,
+    so the stash size should be selected by select_cuckoo_params, which makes a retry as unlikely as 2^-stat_security
+    """
+    for _ in range(retries):
+        table = CuckooHashTable(n, s, hash_count, secrets.token_bytes(16))
+        try:
+            table.build(words)
+            return table
+        except IndexError:
+            continue
+    raise IndexError(f"unable to build cuckoo hash table after {retries} retries, stash size {s} is too small")
@@ -0,0 +1,309 @@
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .match import _prefix_keys
+from ..pair import Pair, send_array, recv_array
+from ..serialize import int_to_bytes, bytes_to_int
+from ..utils import pack_list, unpack_list
+
+__all__ = ["BloomFilter", "GolombCodedSet", "filter_types", "make_filter", "send_filter", "recv_filter"]
+
+_batch_size = 1 << 16  # values processed in one vectorized pass
+
+
+def _mix(keys: np.ndarray, i: int) -> np.ndarray:
+    """
+    splitmix64 finalizer of keys offset by i, used to derive independent positions from one 64 bits key
+    """
+    z = keys + np.uint64((i * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _filter_keys(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    two uint64 keys of the first 16 bytes of every value, shorter values are zero padded.
+    the bytes are mixed by a 3 rounds feistel network, which is a permutation, so distinct values have distinct keys
+    """
+    k1 = _prefix_keys(values)
+    k2 = _prefix_keys(values[:, 8:16])
+    k2 ^= _mix(k1, 1)
+    k1 ^= _mix(k2, 2)
+    k2 ^= _mix(k1, 3)
+    return k1, k2
+
+
+def _pack_uint(values: np.ndarray, bits: int) -> np.ndarray:
+    """
+    pack every element of a 1-d uint64 array into bits big endian bits
+    """
+    shifts = np.arange(bits - 1, -1, -1, dtype=np.uint64)
+    res = []
+    # a multiple of 8 values fills whole bytes, so chunks can be packed separately
+    for start in range(0, values.size, _batch_size * 8):
+        chunk = values[start: start + _batch_size * 8]
+        res.append(np.packbits(((chunk[:, None] >> shifts) & np.uint64(1)).astype(np.uint8)))
+    return np.concatenate(res) if res else np.empty(0, dtype=np.uint8)
+
+
+def _unpack_uint(data: np.ndarray, count: int, bits: int) -> np.ndarray:
+    """
+    unpack count values of bits bits packed by _pack_uint
+    """
+    weights = np.uint64(1) << np.arange(bits - 1, -1, -1, dtype=np.uint64)
+    res = np.empty(count, dtype=np.uint64)
+    for start in range(0, count, _batch_size * 8):
+        stop = min(start + _batch_size * 8, count)
+        chunk = np.unpackbits(data[start * bits // 8: (stop * bits + 7) // 8], count=(stop - start) * bits)
+        res[start:stop] = (chunk.reshape(-1, bits).astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)
+    return res
+
+
+def _check_fp_rate(fp_rate: float):
+    if not 0 < fp_rate < 1:
+        raise ValueError(f"false positive rate {fp_rate} should be in (0, 1)")
+
+
+def _bloom_positions(k1: np.ndarray, k2: np.ndarray, i: int, size: int) -> np.ndarray:
+    """
+    position i of every value, every position is mixed from the keys on its own. with double hashing,
+    k1 + i * k2, a value shares all positions with another one if both keys are equal modulo the filter size,
+    which bounds the false positive rate below by about count / size^2
+    """
+    return (_mix(k1, i) + k2) % np.uint64(size)
+
+
+class BloomFilter(object):
+    """
+    bloom filter of oprf values, positions are derived from the first 16 bytes of each value.
+    it takes about 1.44 * log2(1 / fp_rate) bits of each value, so it is smaller than the values
+    only if the false positive rate is much larger than the collision rate of the oprf outputs.
+    """
+
+    name = "bloom"
+
+    @staticmethod
+    def _size(count: int, fp_rate: float) -> int:
+        """
+        :return: filter bit count
+        """
+        return max(math.ceil(-count * math.log(fp_rate) / math.log(2) ** 2), 8)
+
+    @classmethod
+    def byte_size(cls, count: int, fp_rate: float) -> int:
+        """
+        :return: filter data length of count values
+        """
+        _check_fp_rate(fp_rate)
+        return (cls._size(count, fp_rate) + 7) // 8
+
+    def __init__(self, data: np.ndarray, size: int, hash_count: int):
+        """
+        :param data: 1-d uint8 array, packed filter bits
+        :param size: filter bit count
+        :param hash_count: positions set for each value
+        """
+        if data.size != (size + 7) // 8:
+            raise ValueError(f"bloom filter data length {data.size} does not match filter size {size}")
+        self._data = data
+        self._size = size
+        self._hash_count = hash_count
+
+    @classmethod
+    def from_values(cls, values: np.ndarray, fp_rate: float) -> "BloomFilter":
+        """
+        :param values: 2-d uint8 array, every row is a value
+        :param fp_rate: false positive rate of one membership test
+        """
+        _check_fp_rate(fp_rate)
+        count = values.shape[0]
+        size = cls._size(count, fp_rate)
+        hash_count = max(round(size / max(count, 1) * math.log(2)), 1)
+        data = np.zeros((size + 7) // 8, dtype=np.uint8)
+        for start in range(0, count, _batch_size):
+            k1, k2 = _filter_keys(values[start: start + _batch_size])
+            for i in range(hash_count):
+                positions = _bloom_positions(k1, k2, i, size)
+                masks = np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+                np.bitwise_or.at(data, positions >> np.uint64(3), masks)
+        return cls(data, size, hash_count)
+
+    @property
+    def data(self) -> np.ndarray:
+        return self._data
+
+    @property
+    def params(self) -> List[int]:
+        return [self._size, self._hash_count]
+
+    def contains(self, values: np.ndarray) -> np.ndarray:
+        """
+        :param values: 2-d uint8 array, every row is a value
+        :return: 1-d bool array, element i is True if values[i] may be in the filter
+        """
+        res = np.ones(values.shape[0], dtype=bool)
+        for start in range(0, values.shape[0], _batch_size):
+            k1, k2 = _filter_keys(values[start: start + _batch_size])
+            for i in range(self._hash_count):
+                positions = _bloom_positions(k1, k2, i, self._size)
+                bits = (self._data[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+                res[start: start + k1.size] &= bits.astype(bool)
+        return res
+
+
+class GolombCodedSet(object):
+    """
+    golomb coded set of oprf values. every value is hashed into a slot in [0, slots) and a remainder of
+    remainder_bits bits, which make a number below slots * 2^remainder_bits of up to 128 bits. the numbers are sorted
+    and delta encoded, the quotients of the deltas are stored as an unary stream and the remainders as a fixed width
+    stream, so both encoding and decoding are vectorized. it takes about log2(1 / fp_rate) + 2 bits of each value.
+    """
+
+    name = "gcs"
+
+    def __init__(self, data: np.ndarray, count: int, remainder_bits: int, slots: int):
+        """
+        :param data: 1-d uint8 array, unary stream followed by remainder stream
+        :param count: encoded value count
+        :param remainder_bits: remainder bit count of each delta, at most 64
+        :param slots: values are hashed into slots in [0, slots)
+        """
+        self._data = data
+        self._count = count
+        self._remainder_bits = remainder_bits
+        self._slots = slots
+        self._keys: Optional[Tuple[np.ndarray, np.ndarray]] = None  # decoded slots and remainders
+
+    @staticmethod
+    def _select_remainder_bits(fp_rate: float) -> int:
+        _check_fp_rate(fp_rate)
+        bits = max(math.ceil(-math.log2(fp_rate)), 1)
+        if bits > 64:
+            raise ValueError(f"false positive rate {fp_rate} of golomb coded set should be greater equal than 2^-64")
+        return bits
+
+    @classmethod
+    def byte_size(cls, count: int, fp_rate: float) -> int:
+        """
+        :return: expected filter data length of count values
+        """
+        return (count * (cls._select_remainder_bits(fp_rate) + 2) + 7) // 8
+
+    @staticmethod
+    def _hash(values: np.ndarray, slots: int, remainder_bits: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :return: slot and remainder of every value
+        """
+        k1, k2 = _filter_keys(values)
+        return k1 % np.uint64(slots), k2 & np.uint64((1 << remainder_bits) - 1)
+
+    @classmethod
+    def from_values(cls, values: np.ndarray, fp_rate: float) -> "GolombCodedSet":
+        """
+        :param values: 2-d uint8 array, every row is a value
+        :param fp_rate: false positive rate of one membership test, at least 2^-64
+        """
+        remainder_bits = cls._select_remainder_bits(fp_rate)
+        slots = max(values.shape[0], 1)
+        q, r = cls._hash(values, slots, remainder_bits)
+        order = np.lexsort((r, q))
+        q, r = q[order], r[order]
+        unique = np.ones(q.size, dtype=bool)
+        unique[1:] = (q[1:] != q[:-1]) | (r[1:] != r[:-1])
+        q, r = q[unique], r[unique]
+
+        # the delta of numbers q * 2^remainder_bits + r is split without 128 bits integers,
+        # the remainder borrows one from the quotient if it is less than the previous remainder
+        prev_r = np.concatenate([np.zeros(1, dtype=np.uint64), r[:-1]])
+        quotients = np.diff(q, prepend=np.uint64(0)) - (r < prev_r).astype(np.uint64)
+        remainders = (r - prev_r) & np.uint64((1 << remainder_bits) - 1)
+
+        # every quotient q is encoded as q zeros followed by a one
+        ends = np.cumsum(quotients + np.uint64(1)) - np.uint64(1)
+        unary = np.zeros(int(ends[-1]) + 1 if ends.size else 0, dtype=np.uint8)
+        unary[ends] = 1
+        data = np.concatenate([np.packbits(unary), _pack_uint(remainders, remainder_bits)])
+        return cls(data, q.size, remainder_bits, slots)
+
+    @property
+    def data(self) -> np.ndarray:
+        return self._data
+
+    @property
+    def params(self) -> List[int]:
+        return [self._count, self._remainder_bits, self._slots]
+
+    def _decode(self) -> Tuple[np.ndarray, np.ndarray]:
+        remainder_length = (self._count * self._remainder_bits + 7) // 8
+        unary_length = self._data.size - remainder_length
+        ends = np.nonzero(np.unpackbits(self._data[:unary_length]))[0].astype(np.uint64)
+        if ends.size != self._count:
+            raise ValueError(f"golomb coded set has {ends.size} values, it should have {self._count} values")
+        quotients = np.diff(ends, prepend=np.uint64(0)) - np.uint64(1)
+        if ends.size:
+            quotients[0] = ends[0]
+        remainders = _unpack_uint(self._data[unary_length:], self._count, self._remainder_bits)
+        # sums wrap modulo 2^64, which is a multiple of 2^remainder_bits
+        r = np.cumsum(remainders, dtype=np.uint64) & np.uint64((1 << self._remainder_bits) - 1)
+        prev_r = np.concatenate([np.zeros(1, dtype=np.uint64), r[:-1]])
+        q = np.cumsum(quotients + (r < prev_r).astype(np.uint64), dtype=np.uint64)
+        return q, r
+
+    def contains(self, values: np.ndarray) -> np.ndarray:
+        """
+        :param values: 2-d uint8 array, every row is a value
+        :return: 1-d bool array, element i is True if values[i] may be in the set
+        """
+        if self._keys is None:
+            self._keys = self._decode()
+        slots, remainders = self._keys
+        res = np.zeros(values.shape[0], dtype=bool)
+        if slots.size == 0:
+            return res
+        q, r = self._hash(values, self._slots, self._remainder_bits)
+        lo = np.searchsorted(slots, q, side="left")
+        hi = np.searchsorted(slots, q, side="right")
+        # a slot holds few numbers, so they are compared one by one
+        for offset in range(int((hi - lo).max(initial=0))):
+            index = lo + offset
+            res |= (index < hi) & (remainders[np.minimum(index, slots.size - 1)] == r)
+        return res
+
+
+filter_types = {BloomFilter.name: BloomFilter, GolombCodedSet.name: GolombCodedSet}
+
+
+def make_filter(name: str, values: np.ndarray, fp_rate: float):
+    """
+    :param name: filter type name, one of filter_types
+    :param values: 2-d uint8 array, every row is a value
+    :param fp_rate: false positive rate of one membership test
+    """
+    if name not in filter_types:
+        raise ValueError(f"unknown filter type {name}, it should be one of {', '.join(filter_types)}")
+    return filter_types[name].from_values(values, fp_rate)
+
+
+def send_filter(pair: Pair, f):
+    pair.send(_params_msg(f))
+    send_array(pair, f.data.reshape(-1, 1))
+
+
+def recv_filter(pair: Pair, name: str):
+    return _load_filter(name, pair.recv(), recv_array(pair))
+
+
+def _params_msg(f) -> bytes:
+    return pack_list([int_to_bytes(param) for param in f.params])
+
+
+def _load_filter(name: str, params_msg: bytes, data: np.ndarray):
+    """
+    :param params_msg: filter parameters message
+    :param data: filter data received as a 2-d array of one column
+    """
+    params = [bytes_to_int(param) for param in unpack_list(params_msg)]
+    return filter_types[name](data.reshape(-1), *params)
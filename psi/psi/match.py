@@ -0,0 +1,82 @@
+import numpy as np
+
+__all__ = ["ValueSet"]
+
+
+def _prefix_keys(values: np.ndarray) -> np.ndarray:
+    """
+    read the first 8 bytes of every row of a 2-d uint8 array as a big endian uint64, shorter rows are zero padded
+    """
+    count, width = values.shape
+    if width >= 8:
+        prefix = np.ascontiguousarray(values[:, :8])
+    else:
+        prefix = np.zeros((count, 8), dtype=np.uint8)
+        prefix[:, :width] = values
+    return prefix.view(">u8").reshape(-1).astype(np.uint64)
+
+
+class ValueSet(object):
+    """
+    set of fixed width values stored as a sorted array, membership is tested with one vectorized binary search.
+    values are ordered by their first 8 bytes, the remaining bytes are only compared for the candidates.
+    """
+
+    def __init__(self, values: np.ndarray):
+        """
+        :param values: 2-d uint8 array, every row is a value
+        """
+        self._width = values.shape[1]
+        keys = _prefix_keys(values)
+        order = np.argsort(keys)
+        self._keys = keys[order]
+        self._values = values[order] if self._width > 8 else None
+        # original index of every sorted value, stored in the smallest integer type
+        self._order = order.astype(np.min_scalar_type(max(order.size - 1, 0)))
+
+    def __len__(self):
+        return self._keys.size
+
+    def _search(self, values: np.ndarray) -> np.ndarray:
+        """
+        :return: 1-d int64 array, element i is the sorted position of values[i], -1 if it is not in the set
+        """
+        if values.shape[1] != self._width:
+            raise ValueError(f"value width {values.shape[1]} is not equal to set value width {self._width}")
+        keys = _prefix_keys(values)
+        if self._keys.size == 0:
+            return np.full(keys.size, -1, dtype=np.int64)
+        index = np.searchsorted(self._keys, keys)
+        index[index == self._keys.size] = 0
+        res = np.where(self._keys[index] == keys, index, -1)
+        if self._values is None:
+            return res
+
+        candidates = np.nonzero(res >= 0)[0]
+        equal = (self._values[index[candidates]] == values[candidates]).all(axis=1)
+        res[candidates[~equal]] = -1
+        # values sharing an 8 bytes prefix with another set value are rare, check them one by one
+        for i in candidates[~equal]:
+            stop = np.searchsorted(self._keys, keys[i], side="right")
+            hits = np.nonzero((self._values[index[i]:stop] == values[i]).all(axis=1))[0]
+            if hits.size > 0:
+                res[i] = index[i] + hits[0]
+        return res
+
+    def contains(self, values: np.ndarray) -> np.ndarray:
+        """
+        :param values: 2-d uint8 array, every row is a value
+        :return: 1-d bool array, element i is True if values[i] is in the set
+        """
+        return self._search(values) >= 0
+
+    def find(self, values: np.ndarray) -> np.ndarray:
+        """
+        :param values: 2-d uint8 array, every row is a value
+        :return: 1-d int64 array, element i is the index of values[i] in the values the set is built from,
+            -1 if it is not in the set
+        """
+        res = self._search(values)
+        found = res >= 0
+        res[found] = self._order[res[found]]
+        return res
@@ -0,0 +1,140 @@
+import math
+from typing import NamedTuple, Optional
+
+__all__ = ["CuckooParams", "select_cuckoo_params", "select_codewords", "select_output_length"]
+
+
+class CuckooParams(NamedTuple):
+    factor: float  # table size is factor times item count
+    hash_count: int
+    stash_size: int
+
+    def table_size(self, n: int) -> int:
+        return max(math.ceil(self.factor * n), 1)
+
+
+# (hash count, table factor) -> stash sizes which keep the failure probability below 2^-40
+# for 2^8, 2^12, 2^16, 2^20 and 2^24 items.
+# the 2 hash row is the table of Pinkas, Schneider, Segev and Zohner, "Phasing: private set intersection using
+# permutation-based hashing", USENIX Security 2015, extrapolated from simulated stash sizes.
+# no published table is known for the 3 hash row. for small sets, the estimator in the __main__ block of this module
+# extrapolates about half to two thirds of the sizes of both rows, so the 3 hash row keeps a margin like the 2 hash row
+_stash_sizes = {
+    (2, 2.4): (12, 6, 4, 3, 2),
+    (3, 1.2): (6, 5, 4, 3, 2),
+}
+_log_sizes = (8, 12, 16, 20, 24)
+
+# table without stash, its failure probability is about 4 / n^2 (Θ(n^(1 - hash count))).
+# it is used only when that is below 2^-stat_security, and the server never evaluates stash positions
+_stash_free_params = (3, 1.27)
+
+
+def _stash_size(sizes, n: int, stat_security: int) -> int:
+    log_n = math.log2(max(n, 2))
+    # use the nearest smaller set size in the table, which has a larger stash
+    i = max([i for i, log_size in enumerate(_log_sizes) if log_size <= log_n], default=0)
+    # the probability that more than s items are stashed decreases geometrically with s, so its log2 is taken
+    # as linear from 0 at s = -1 (no stash at all) to -40 at the size in the table
+    return max(math.ceil((sizes[i] + 1) * stat_security / 40) - 1, 0)
+
+
+def select_cuckoo_params(n: int, peer_n: Optional[int] = None, stat_security: int = 40) -> CuckooParams:
+    """
+    select cuckoo hashing parameters for n items, which minimize the oprf work of both sides,
+    the probability that the stash overflows is less than 2^-stat_security.
+    so the table built with the first random hash seed fits except with that probability,
+    and building it again with a new seed, which depends on the client items, is only an error path
+
+    :param n: item count of the client
+    :param peer_n: item count of the server, assumed to be n if it is unknown
+    :param stat_security: statistical security parameter
+    """
+    if peer_n is None:
+        peer_n = n
+    candidates = [
+        CuckooParams(factor, hash_count, _stash_size(sizes, n, stat_security))
+        for (hash_count, factor), sizes in _stash_sizes.items()
+    ]
+    if 2 - 2 * math.log2(max(n, 1)) <= -stat_security:
+        hash_count, factor = _stash_free_params
+        candidates.append(CuckooParams(factor, hash_count, 0))
+
+    res = None
+    min_cost = 0
+    for params in candidates:
+        # oprf instances of the client, and oprf evaluations of the server
+        cost = params.table_size(n) + params.stash_size + (params.hash_count + params.stash_size) * peer_n
+        if res is None or cost < min_cost:
+            res = params
+            min_cost = cost
+    return res
+
+
+def _log2_binomial_cdf(k: int, x: int) -> float:
+    """
+    :return: log2 of P[X < x], X ~ Binomial(k, 1/2)
+    """
+    terms = [
+        (math.lgamma(k + 1) - math.lgamma(i + 1) - math.lgamma(k - i + 1)) / math.log(2) - k
+        for i in range(min(x, k + 1))
+    ]
+    if not terms:
+        return -math.inf
+    top = max(terms)
+    return top + math.log2(sum(2 ** (t - top) for t in terms))
+
+
+def select_codewords(server_count: int, stat_security: int = 40, comp_security: int = 128) -> int:
+    """
+    select the codewords length of the oprf, the pseudo random code of every input the server evaluates
+    should have a hamming distance no less than comp_security to the client input of the same oprf instance,
+    except with probability 2^-stat_security (union bound over all server evaluations)
+
+    :param server_count: oprf evaluation count of the server
+    :return: codewords length, a multiple of 8
+    """
+    bound = -stat_security - math.log2(max(server_count, 1))
+    k = comp_security
+    while _log2_binomial_cdf(k, comp_security) > bound:
+        k += 8
+    return k
+
+
+def select_output_length(server_count: int, client_count: int, stat_security: int = 40) -> int:
+    """
+    select the oprf output length, the probability that any server output collides with any client output
+    of a different input should be less than 2^-stat_security
+
+    :param server_count: oprf evaluation count of the server
+    :param client_count: oprf instance count of the client
+    :return: output length in bytes, at most 32 (length of SHA256 digest)
+    """
+    bits = stat_security + math.log2(max(server_count, 1)) + math.log2(max(client_count, 1))
+    return min(math.ceil(bits / 8), 32)
+
+
+if __name__ == '__main__':
+    import secrets
+    import sys
+
+    from .cuckoo import CuckooHashTable
+
+    # estimate the stash size of 2^-40 failure probability from the probability that any item is stashed,
+    # assuming every stash slot decreases the failure probability by the same factor
+    trials = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    for log_n in (8, 10):
+        count = 1 << log_n
+        words = [i.to_bytes(8, "big") for i in range(count)]
+        for (hash_count, factor), sizes in _stash_sizes.items():
+            stashed = 0
+            for _ in range(trials):
+                table = CuckooHashTable(math.ceil(factor * count), 64, hash_count, secrets.token_bytes(16))
+                table.build(words)
+                stashed += table.stash_index[0] >= 0
+            # one more stashed table is assumed, so the estimate is finite if none is stashed
+            decay = -math.log2((stashed + 1) / (trials + 1))
+            print(
+                f"{count} items, {hash_count} hashes, factor {factor}: {stashed} of {trials} tables stash items, "
+                f"estimated stash size {math.ceil(40 / decay) - 1}, selected {_stash_size(sizes, count, 40)}"
+            )
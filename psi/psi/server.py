@@ -1,55 +1,203 @@
 import random
 import logging
-from typing import List
+from contextlib import nullcontext
+from itertools import chain
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
 
-from .cuckoo import position_hash
-from ..oprf import Server as OprfServer
-from ..pair import Pair
+import numpy as np
+
+from .cuckoo import position_hashes
+from .filter import filter_types, make_filter, send_filter
+from .params import select_codewords, select_output_length
+from ..oprf import Server as OprfServer, ServerPool
+from ..pair import Pair, send_array_chunks
+from ..serialize import bytes_to_int, int_to_bytes
+from ..utils import pack_list, unpack_list, prefetch
 
 
 _logger = logging.getLogger()
 
 
 class Server(object):
-    def __init__(self, pair: Pair, words: List[bytes]):
-        self.s = 5
+    _chunk_size: int = 1 << 16  # words evaluated at once, when the evaluation is not in a process pool
+
+    def __init__(
+        self,
+        pair: Pair,
+        words: List[bytes],
+        curve: str = "secp256r1",
+        stat_security: int = 40,
+        filter_type: Optional[str] = None,
+        fp_rate: Optional[float] = None,
+        workers: int = 1,
+        pipeline: bool = False,
+    ):
+        if filter_type is not None and filter_type not in filter_types:
+            raise ValueError(f"unknown filter type {filter_type}, it should be one of {', '.join(filter_types)}")
+        self.curve = curve
+        self.stat_security = stat_security
+        # oprf values are sent as a filter of this type instead of arrays if it is not None
+        self.filter_type = filter_type
+        # false positive rate of one filter lookup, 2^-stat_security for the whole intersection if it is None.
+        # a false positive is a client word out of the intersection, which the client reports to the server as a match
+        self.fp_rate = fp_rate
+        self.workers = workers  # oprf evaluation processes, evaluate in this process if it is 1
+        self.pipeline = pipeline  # evaluate the next chunks in a background thread while sending this one
+        self.n = 0  # cuckoo hash table size
+        self.s = 0  # stash size
+        self.hash_count = 0
+        self.seed = b""  # cuckoo hash seed
         self.words = words
 
-        self.oprf_server = OprfServer(pair, 512)
+        self.oprf_server: Optional[OprfServer] = None
         self.pair = pair
 
     def prepare(self):
+        self.pair.send(self._handshake())
+        codewords, output_length = self._accept(self.pair.recv())
+
+        self.oprf_server = OprfServer(self.pair, codewords, self.curve, output_length)
         self.oprf_server.prepare()
+        self._check_oprf()
 
-    def intersect(self):
-        n = self.oprf_server.max_count - self.s
-        for i in range(3):
-            words = random.sample(self.words, len(self.words))
-            for word in words:
-                h = position_hash(i + 1, word, n)
-                val = self.oprf_server.eval(h, word + bytes([i + 1]))
-                _logger.debug(
-                    f"hash index {i + 1}, table position {h}, word {int.from_bytes(word, 'big')}, val {val.hex()}"
-                )
-                self.pair.send(val)
-            self.pair.send(b"end")
-
-        for i in range(self.s):
-            words = random.sample(self.words, len(self.words))
-            for word in words:
-                val = self.oprf_server.eval(n + i, word)
-                _logger.debug(
-                    f"table position {n + i}, "
-                    f"word {int.from_bytes(word, 'big')}, val {val.hex()}"
+    def _handshake(self) -> bytes:
+        """
+        handshake, the server sends its set size, statistical security parameter and filter type,
+        and the client replies cuckoo hashing parameters, codewords length and oprf output length
+        """
+        return pack_list([
+            int_to_bytes(len(self.words)),
+            int_to_bytes(self.stat_security),
+            (self.filter_type or "").encode("utf-8"),
+        ])
+
+    def _accept(self, msg: bytes) -> Tuple[int, int]:
+        """
+        check the parameters replied by the client
+
+        :return: codewords length and oprf output length
+        """
+        n_bytes, hash_count_bytes, s_bytes, self.seed, codewords_bytes, output_length_bytes = unpack_list(msg)
+        self.n = bytes_to_int(n_bytes)
+        self.hash_count = bytes_to_int(hash_count_bytes)
+        self.s = bytes_to_int(s_bytes)
+        codewords = bytes_to_int(codewords_bytes)
+        output_length = bytes_to_int(output_length_bytes)
+        server_count = (self.hash_count + self.s) * len(self.words)
+        min_codewords = select_codewords(server_count, self.stat_security)
+        if codewords < min_codewords:
+            raise ValueError(f"codewords {codewords} is too small, it should be greater equal than {min_codewords}")
+        min_output_length = select_output_length(server_count, self.n + self.s, self.stat_security)
+        if output_length < min_output_length:
+            raise ValueError(
+                f"oprf output length {output_length} is too small, "
+                f"it should be greater equal than {min_output_length}"
+            )
+        if output_length > 32:
+            raise ValueError(f"oprf output length {output_length} should be at most 32")
+
+        if self.filter_type is not None and output_length < 8:
+            raise ValueError(f"oprf output length {output_length} is too small for filter mode, it should be at least 8")
+        if self.fp_rate is None:
+            self.fp_rate = 2 ** -self.stat_security / (self.n + self.s)
+        if self.filter_type is not None and len(self.words) > 0:
+            filter_size = filter_types[self.filter_type].byte_size(len(self.words), self.fp_rate)
+            if filter_size >= len(self.words) * output_length:
+                raise ValueError(
+                    f"{self.filter_type} filter of {filter_size} bytes is not smaller than "
+                    f"{len(self.words) * output_length} bytes of oprf values, send arrays or use a larger fp_rate"
                 )
-                self.pair.send(val)
-        self.pair.send(b"end")
+        return codewords, output_length
+
+    def _check_oprf(self):
+        if self.oprf_server.max_count != self.n + self.s:
+            raise ValueError(
+                f"oprf instance count {self.oprf_server.max_count} does not match "
+                f"cuckoo table size {self.n} and stash size {self.s}"
+            )
+
+    def _eval(
+        self, pool: Optional[ServerPool], positions: Sequence[int], words: List[bytes], hash_index: int = 0
+    ) -> Iterator[np.ndarray]:
+        """
+        evaluate oprf of words at table positions, outputs are yielded chunk by chunk
+
+        :param hash_index: 1-based hash function index appended to every word, 0 means the stash
+        """
+        data = [word + bytes([hash_index]) for word in words] if hash_index else words
+        if pool is None:
+            size = self._chunk_size
+            chunks = (
+                self.oprf_server.eval_batch(positions[start: start + size], data[start: start + size])
+                for start in range(0, len(data), size)
+            )
+        else:
+            chunks = pool.eval_batch(positions, data)
+        start = 0
+        for vals in chunks:
+            if _logger.isEnabledFor(logging.DEBUG):
+                for word, h, val in zip(words[start:], positions[start:], vals):
+                    _logger.debug(
+                        f"hash index {hash_index}, table position {h}, "
+                        f"word {int.from_bytes(word, 'big')}, val {val.tobytes().hex()}"
+                    )
+            start += len(vals)
+            yield vals
+
+    def _send_vals(self, count: int, chunks: Iterable[np.ndarray]):
+        output_length = self.oprf_server.output_length
+        if self.filter_type is None:
+            send_array_chunks(self.pair, count, output_length, prefetch(chunks) if self.pipeline else chunks)
+        else:
+            vals = np.concatenate([np.empty((0, output_length), np.uint8), *chunks])
+            send_filter(self.pair, make_filter(self.filter_type, vals, self.fp_rate))
+
+    def _tables(self, pool: Optional[ServerPool]) -> List[Tuple[int, Iterator[np.ndarray]]]:
+        """
+        oprf outputs of the words with every hash index and the stash, in the order they are sent to the client,
+        outputs are evaluated chunk by chunk as the iterators are consumed
+
+        :return: output count and output chunks of every table
+        """
+        n = self.n
+        count = len(self.words)
+        all_positions = position_hashes(self.words, n, self.hash_count, self.seed)
+        tables = [(count, self._eval_shuffled(pool, all_positions[i], i + 1)) for i in range(self.hash_count)]
+        # the stash size is fixed at setup, nothing is sent for the stash if it is empty
+        if self.s > 0:
+            stash_chunks = chain.from_iterable(
+                self._eval(pool, [n + i] * count, random.sample(self.words, count)) for i in range(self.s)
+            )
+            tables.append((self.s * count, stash_chunks))
+        return tables
+
+    def _eval_shuffled(
+        self, pool: Optional[ServerPool], positions: np.ndarray, hash_index: int
+    ) -> Iterator[np.ndarray]:
+        """
+        evaluate oprf of all words in a random order, so the order of outputs reveals nothing
+        """
+        count = len(self.words)
+        order = random.sample(range(count), count)
+        words = [self.words[j] for j in order]
+        yield from self._eval(pool, positions[order], words, hash_index)
+
+    def iter_intersect(self) -> Iterator[bytes]:
+        """
+        intersect stage, the words in the intersection are yielded as soon as the client sends them.
+        the iterator should be consumed to the end.
+        """
+        pool_context = ServerPool(self.oprf_server, self.workers) if self.workers > 1 else nullcontext()
+        with pool_context as pool:
+            for count, chunks in self._tables(pool):
+                self._send_vals(count, chunks)
 
-        res: List[bytes] = []
         while True:
-            word = self.pair.recv()
-            if word == b"end":
+            words = unpack_list(self.pair.recv())
+            # an empty batch marks the end of the matches
+            if not words:
                 break
-            res.append(word)
+            yield from words
 
-        return res
+    def intersect(self) -> List[bytes]:
+        return list(self.iter_intersect())
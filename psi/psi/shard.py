@@ -0,0 +1,244 @@
+import abc
+import multiprocessing
+import queue
+import threading
+import traceback
+from multiprocessing.connection import Connection
+from typing import Any, Dict, Iterator, List, Sequence, Tuple, Type, Union
+
+from .bucket import bucket_index, bucket_capacity, pad_bucket
+from .client import Client
+from .server import Server
+from ..pair import Address, Pair
+from ..serialize import int_to_bytes, bytes_to_int
+
+__all__ = ["shard_words", "ShardedClient", "ShardedServer"]
+
+
+def shard_words(words: Sequence[bytes], shards: int, stat_security: int = 40) -> List[List[bytes]]:
+    """
+    partition words into shards by the public bucket hash, every shard is padded to the same size,
+    so shard sizes reveal nothing but the word count
+    """
+    groups: List[List[bytes]] = [[] for _ in range(shards)]
+    for word in words:
+        groups[bucket_index(word, shards)].append(word)
+    capacity = bucket_capacity(len(words), shards, stat_security)
+    return [pad_bucket(list(dict.fromkeys(group)), capacity) for group in groups]
+
+
+class _ProcessPair(Pair):
+    """
+    pair of a shard process, messages are relayed by the parent process through the pair of the shard
+    """
+
+    def __init__(self, send_conn: Connection, recv_conn: Connection):
+        """
+        :param send_conn: events of the shard to the parent, sent messages are "send" events
+        :param recv_conn: a message is requested by an empty message, and the parent replies the received one
+        """
+        self._send_conn = send_conn
+        self._recv_conn = recv_conn
+        self._local = Address()
+        self._peer = Address()
+
+    def send(self, data: bytes):
+        self._send_conn.send(("send", data))
+
+    def recv(self) -> bytes:
+        self._recv_conn.send_bytes(b"")
+        return self._recv_conn.recv_bytes()
+
+    def barrier(self):
+        self.send(b"barrier")
+        msg = self.recv()
+        assert msg == b"barrier"
+
+    def close(self):
+        self._send_conn.close()
+        self._recv_conn.close()
+
+
+def _run_shard(
+    party_type: Type[Union[Client, Server]],
+    words: List[bytes],
+    kwargs: Dict[str, Any],
+    send_conn: Connection,
+    recv_conn: Connection,
+):
+    """
+    run one psi party in a shard process, the events are "prepared", and "done" with the intersection,
+    or "error" with the traceback
+    """
+    with _ProcessPair(send_conn, recv_conn) as pair:
+        try:
+            party = party_type(pair, words, **kwargs)
+            party.prepare()
+            send_conn.send(("prepared", None))
+            send_conn.send(("done", party.intersect()))
+        except Exception:
+            send_conn.send(("error", traceback.format_exc()))
+
+
+class _Sharded(abc.ABC):
+    """
+    runs one psi party for every shard concurrently, each shard in its own process, so all cores are used.
+    the pairs should be channels of the same connection, such as pair.make_pairs,
+    so K shards need no more connections than one psi. the pairs stay in this process,
+    and two relay threads of every shard pass the messages between the pair and the shard process.
+
+    if one shard fails, the other shard processes are terminated and all pairs are closed,
+    so the shards of the peer fail too instead of waiting for messages.
+    """
+
+    def __init__(
+        self,
+        pairs: Sequence[Pair],
+        words: Sequence[bytes],
+        party_type: Type[Union[Client, Server]],
+        kwargs: Dict[str, Any],
+    ):
+        self.pairs = pairs
+        self.shards = shard_words(words, len(pairs), kwargs.get("stat_security", 40))
+        self._party_type = party_type
+        self._kwargs = kwargs
+
+        self._processes: List[multiprocessing.Process] = []
+        self._events: "queue.Queue[Tuple[int, str, Any]]" = queue.Queue()  # shard index, event and its payload
+        self._results: List[List[bytes]] = []  # intersections of the shards finished before they are yielded
+        self._finished = 0
+
+    @abc.abstractmethod
+    def _check_shards(self):
+        ...
+
+    def _relay_events(self, index: int, conn: Connection):
+        """
+        send the messages of a shard process to the peer, and pass its other events to the main thread
+        """
+        try:
+            while True:
+                event, payload = conn.recv()
+                if event == "send":
+                    self.pairs[index].send(payload)
+                    continue
+                self._events.put((index, event, payload))
+                if event != "prepared":
+                    break
+        except EOFError:
+            self._events.put((index, "error", "shard process exits unexpectedly"))
+        except Exception as e:
+            self._events.put((index, "error", f"{type(e).__name__}: {e}"))
+        finally:
+            conn.close()
+
+    def _relay_recv(self, index: int, conn: Connection):
+        """
+        receive a message from the peer for every request of a shard process
+        """
+        try:
+            while True:
+                conn.recv_bytes()
+                conn.send_bytes(self.pairs[index].recv())
+        except EOFError:
+            # the shard process exits
+            pass
+        except Exception as e:
+            self._events.put((index, "error", f"{type(e).__name__}: {e}"))
+        finally:
+            conn.close()
+
+    def _abort(self):
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+        for pair in self.pairs:
+            pair.close()
+        for process in self._processes:
+            process.join()
+
+    def _next_event(self) -> Tuple[int, str, Any]:
+        index, event, payload = self._events.get()
+        if event == "error":
+            self._abort()
+            raise RuntimeError(f"shard {index} failed: {payload}")
+        return index, event, payload
+
+    def prepare(self):
+        self._check_shards()
+        for index, shard in enumerate(self.shards):
+            events_recv, events_send = multiprocessing.Pipe(duplex=False)
+            recv_conn, child_recv_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_run_shard,
+                args=(self._party_type, shard, self._kwargs, events_send, child_recv_conn),
+                daemon=True,
+            )
+            process.start()
+            events_send.close()
+            child_recv_conn.close()
+            self._processes.append(process)
+            threading.Thread(target=self._relay_events, args=(index, events_recv), daemon=True).start()
+            threading.Thread(target=self._relay_recv, args=(index, recv_conn), daemon=True).start()
+
+        prepared = 0
+        while prepared < len(self.shards):
+            _, event, payload = self._next_event()
+            if event == "prepared":
+                prepared += 1
+            else:
+                self._results.append(payload)
+                self._finished += 1
+
+    def iter_intersect(self) -> Iterator[bytes]:
+        """
+        intersect stage of all shards, the intersection of every shard is yielded as soon as it is finished
+        """
+        try:
+            while self._results:
+                yield from self._results.pop()
+            while self._finished < len(self.shards):
+                _, event, payload = self._next_event()
+                self._finished += 1
+                yield from payload
+        finally:
+            if self._finished < len(self.shards):
+                # the iterator is closed early or a shard failed
+                self._abort()
+            for process in self._processes:
+                process.join()
+
+    def intersect(self) -> List[bytes]:
+        return list(self.iter_intersect())
+
+
+class ShardedClient(_Sharded):
+    def __init__(self, pairs: Sequence[Pair], words: Sequence[bytes], **kwargs):
+        """
+        :param pairs: one pair for every shard, in the same order as the peer
+        :param words: client words
+        :param kwargs: parameters of Client
+        """
+        super(ShardedClient, self).__init__(pairs, words, Client, kwargs)
+
+    def _check_shards(self):
+        peer_shards = bytes_to_int(self.pairs[0].recv())
+        if peer_shards != len(self.pairs):
+            raise ValueError(f"shard count {len(self.pairs)} is not equal to server shard count {peer_shards}")
+
+
+class ShardedServer(_Sharded):
+    def __init__(self, pairs: Sequence[Pair], words: Sequence[bytes], **kwargs):
+        """
+        :param pairs: one pair for every shard, in the same order as the peer
+        :param words: server words
+        :param kwargs: parameters of Server, workers should be 1
+        """
+        workers = kwargs.get("workers", 1)
+        if workers > 1:
+            # a process pool of every shard would start workers * shards processes, the shards use the cores instead
+            raise ValueError(f"workers {workers} is not supported by ShardedServer, it should be 1")
+        super(ShardedServer, self).__init__(pairs, words, Server, kwargs)
+
+    def _check_shards(self):
+        self.pairs[0].send(int_to_bytes(len(self.pairs)))
@@ -1,8 +1,10 @@
+from typing import Tuple
+
 import numpy as np
 
 from .int import int_to_bytes, bytes_to_int
 
-__all__ = ["bit_arr_to_bytes", "bytes_to_bit_arr"]
+__all__ = ["bit_arr_to_bytes", "bytes_to_bit_arr", "bytes_to_packed_bit_arr", "bit_matrix_to_bytes", "bytes_to_bit_matrix"]
 
 
 def bit_arr_to_bytes(arr: np.ndarray) -> bytes:
@@ -23,10 +25,40 @@ def bytes_to_bit_arr(data: bytes) -> np.ndarray:
     :param data: bytes, first 4 bytes is array length, and the remaining is array data
     :return:
     """
+    n, packed = bytes_to_packed_bit_arr(data)
+    arr = np.frombuffer(packed, dtype=np.uint8)
+    res = np.unpackbits(arr)[len(packed) * 8 - n:]
+    return res
+
+
+def bytes_to_packed_bit_arr(data: bytes) -> Tuple[int, bytes]:
+    """
+    :param data: bytes, first 4 bytes is array length, and the remaining is array data
+    :return: array length, and array data packed in bytes (without length prefix)
+    """
     prefix_length = 4
     n = bytes_to_int(data[:prefix_length])
     while (n + 7) // 8 != len(data) - prefix_length:
         prefix_length += 4
-    arr = np.array(list(data[prefix_length:]), dtype=np.uint8)
-    res = np.unpackbits(arr)[-n:]
-    return res
+    return n, data[prefix_length:]
+
+
+def bit_matrix_to_bytes(arr: np.ndarray) -> np.ndarray:
+    """
+    :param arr: 2-d uint8 numpy array of 0 and 1
+    :return: 2-d uint8 array, row i is the bytes of arr[i, :] packed in the same way as bit_arr_to_bytes,
+    without the length prefix
+    """
+    n = arr.shape[1]
+    pad_width = (8 - n % 8) % 8
+    arr = np.pad(arr, pad_width=((0, 0), (pad_width, 0)), constant_values=0)
+    return np.packbits(arr, axis=1)
+
+
+def bytes_to_bit_matrix(data: np.ndarray, n: int) -> np.ndarray:
+    """
+    :param data: 2-d uint8 array, each row is the packed bytes of a bit array (without length prefix)
+    :param n: bit array length of each row
+    :return: 2-d uint8 array of 0 and 1, shape: rows * n
+    """
+    return np.unpackbits(data, axis=1)[:, data.shape[1] * 8 - n:]
@@ -1,11 +1,16 @@
+from typing import Dict, NamedTuple
+
 from Crypto.PublicKey import ECC
 
-__all__ = ["point_to_bytes", "key_to_bytes", "bytes_to_key"]
+__all__ = [
+    "point_to_bytes", "key_to_bytes", "bytes_to_key", "point_to_raw_bytes", "raw_bytes_to_point", "curve_name"
+]
 
 
 def point_to_bytes(point: ECC.EccPoint):
-    xs = point.x.to_bytes()  # type: ignore
-    ys = bytes([2 + point.y.is_odd()])  # type: ignore
+    x = int(point.x)
+    xs = x.to_bytes((x.bit_length() + 7) // 8, "big")
+    ys = bytes([2 + (int(point.y) & 1)])
     return xs + ys
 
 
@@ -17,3 +22,135 @@ def key_to_bytes(key: ECC.EccKey) -> bytes:
 
 def bytes_to_key(data: bytes) -> ECC.EccKey:
     return ECC.import_key(data)
+
+
+class _Curve(NamedTuple):
+    name: str
+    p: int  # field prime, the curves are y^2 = x^3 - 3x + b
+    b: int
+
+
+# weierstrass curves accepted by raw_bytes_to_point, keyed by the lower case aliases used by pycryptodome
+_curve_aliases = [
+    (
+        ("p192", "nist p-192", "p-192", "prime192v1", "secp192r1", "nistp192"),
+        _Curve(
+            "NIST P-192",
+            2 ** 192 - 2 ** 64 - 1,
+            0x64210519e59c80e70fa7e9ab72243049feb8deecc146b9b1,
+        ),
+    ),
+    (
+        ("p224", "nist p-224", "p-224", "prime224v1", "secp224r1", "nistp224"),
+        _Curve(
+            "NIST P-224",
+            2 ** 224 - 2 ** 96 + 1,
+            0xb4050a850c04b3abf54132565044b0b7d7bfd8ba270b39432355ffb4,
+        ),
+    ),
+    (
+        ("p256", "nist p-256", "p-256", "prime256v1", "secp256r1", "nistp256"),
+        _Curve(
+            "NIST P-256",
+            2 ** 256 - 2 ** 224 + 2 ** 192 + 2 ** 96 - 1,
+            0x5ac635d8aa3a93e7b3ebbd55769886bc651d06b0cc53b0f63bce3c3e27d2604b,
+        ),
+    ),
+    (
+        ("p384", "nist p-384", "p-384", "prime384v1", "secp384r1", "nistp384"),
+        _Curve(
+            "NIST P-384",
+            2 ** 384 - 2 ** 128 - 2 ** 96 + 2 ** 32 - 1,
+            0xb3312fa7e23ee7e4988e056be3f82d19181d9c6efe8141120314088f5013875ac656398d8a2ed19d2a85c8edd3ec2aef,
+        ),
+    ),
+    (
+        ("p521", "nist p-521", "p-521", "prime521v1", "secp521r1", "nistp521"),
+        _Curve(
+            "NIST P-521",
+            2 ** 521 - 1,
+            0x051953eb9618e1c9a1f929a21a0b68540eea2da725b99b315f3b8b489918ef109e156193951ec7e937b1652c0bd3bb1bf073573df883d2c34f1ef451fd46b503f00,
+        ),
+    ),
+]
+_curves: Dict[str, _Curve] = {name: curve for names, curve in _curve_aliases for name in names}
+
+
+def _is_edwards(curve: str) -> bool:
+    return curve.lower() in ("ed25519", "ed448")
+
+
+def curve_name(curve: str) -> str:
+    """
+    canonical name of a curve, all aliases of a curve such as secp256r1 and P-256 have the same name
+    """
+    if _is_edwards(curve):
+        return curve.lower()
+    try:
+        return _curves[curve.lower()].name
+    except KeyError:
+        raise ValueError(f"unsupported curve {curve}") from None
+
+
+def _sqrt_mod(a: int, p: int) -> int:
+    """
+    a square root of a modulo the odd prime p by Tonelli-Shanks, a should be a quadratic residue
+    """
+    if p % 4 == 3:
+        return pow(a, (p + 1) // 4, p)
+    # p - 1 = q * 2^s with odd q
+    q, s = p - 1, 0
+    while q % 2 == 0:
+        q //= 2
+        s += 1
+    z = 2
+    while pow(z, (p - 1) // 2, p) != p - 1:
+        z += 1
+    m, c, t, r = s, pow(z, q, p), pow(a, q, p), pow(a, (q + 1) // 2, p)
+    while t != 1:
+        # least i that t^(2^i) = 1, there is none if a is not a residue
+        i, t2 = 0, t
+        while t2 != 1:
+            t2 = t2 * t2 % p
+            i += 1
+            if i == m:
+                return 0
+        b = pow(c, 1 << (m - i - 1), p)
+        m, c, t, r = i, b * b % p, t * b * b % p, r * b % p
+    return r
+
+
+def point_to_raw_bytes(point: ECC.EccPoint, curve: str) -> bytes:
+    """
+    compressed point encoding without DER wrapping,
+    SEC1 compressed format for weierstrass curves and RFC 8032 format for edwards curves
+    """
+    if _is_edwards(curve):
+        return ECC.EccKey(curve=curve, point=point).export_key(format="raw")  # type: ignore
+    x = int(point.x)
+    return bytes([2 + (int(point.y) & 1)]) + x.to_bytes(point.size_in_bytes(), "big")
+
+
+def raw_bytes_to_point(data: bytes, curve: str) -> ECC.EccPoint:
+    if _is_edwards(curve):
+        # edwards curves are only supported by pycryptodome which has eddsa
+        from Crypto.Signature import eddsa
+
+        return eddsa.import_public_key(data).pointQ
+
+    params = _curves.get(curve.lower())
+    if params is None:
+        raise ValueError(f"unsupported curve {curve}")
+    if len(data) == 0 or data[0] not in (2, 3):
+        raise ValueError("only compressed point is supported")
+    p = params.p
+    x = int.from_bytes(data[1:], "big")
+    if x >= p:
+        raise ValueError("invalid point, x is not less than the field prime")
+    y2 = (pow(x, 3, p) - 3 * x + params.b) % p
+    y = _sqrt_mod(y2, p)
+    if y * y % p != y2:
+        raise ValueError("invalid point, it is not on the curve")
+    if (y & 1) != data[0] - 2:
+        y = (p - y) % p
+    return ECC.EccPoint(x, y, curve)
@@ -1,8 +1,11 @@
 import logging
+from contextlib import ExitStack
 
-from psi.pair import Address, make_pair
+from psi.pair import Address, make_pair, make_pairs
 from psi import config
-from psi.psi import Server
+from psi.loader import load_input
+from psi.psi import Server, BucketServer, ShardedServer
+from psi.writer import ResultWriter
 
 
 def start_server(address: str):
@@ -12,24 +15,60 @@ def start_server(address: str):
     local_address = Address(config.host, config.port)
     peer_address = Address(peer_host, peer_port)
 
-    with open(config.data, mode="r", encoding="utf-8") as f:
-        data = [line.rstrip().encode("utf-8") for line in f]
+    if config.workers > 1 and config.shards > 1:
+        raise ValueError("workers and shards can not be used together")
+    party_input = load_input(
+        config.data,
+        data_format=config.data_format,
+        dedup=config.dedup,
+        trim=config.trim,
+        case=config.case,
+        id_width=config.id_width,
+        result_format=config.result_format,
+        bucketed=config.bucket_memory is not None,
+        shards=config.shards,
+    )
+
+    options = dict(
+        curve=config.curve,
+        stat_security=config.stat_security,
+        filter_type=config.filter_type,
+        fp_rate=config.fp_rate,
+        workers=config.workers,
+        pipeline=config.pipeline,
+    )  # psi server parameters
+    with ExitStack() as stack:
+        if config.shards > 1:
+            # shards are channels of one connection
+            pairs = [stack.enter_context(pair) for pair in make_pairs(local_address, peer_address, config.shards)]
+        else:
+            pairs = [stack.enter_context(make_pair(local_address, peer_address))]
+        pair = pairs[0]
+
+        if config.bucket_memory is not None:
+            # items are parsed chunk by chunk and partitioned into buckets on disk in prepare stage
+            server = BucketServer(pair, party_input.chunks, config.bucket_memory, config.bucket_dir, **options)
+        elif config.shards > 1:
+            server = ShardedServer(pairs, party_input.items, **options)
+        else:
+            server = Server(pair, party_input.items, **options)
 
-    with make_pair(local_address, peer_address) as pair:
-        server = Server(pair, data)  # psi server
         logging.info("start prepare")
         server.prepare()  # prepare stage
         logging.info("finish prepare")
 
         logging.info("start intersection")
-        res = server.intersect()  # intersect stage, res is the intersection
+        # intersect stage, items in the intersection are written to the result as soon as they are found
+        with ResultWriter(
+            config.result,
+            output_format=config.result_format,
+            sort=config.sort_result,
+            data_format=config.data_format,
+            id_width=config.id_width,
+            rows=party_input.rows,
+        ) as writer:
+            for item in server.iter_intersect():
+                writer.write(item)
         logging.info("finish intersection")
 
-        # save result
-        res_strs = sorted([val.decode("utf-8") for val in res])
-        with open(config.result, mode="w", encoding="utf-8") as f:
-            for line in res_strs:
-                f.write(line)
-                f.write("\n")
-
         pair.barrier()
@@ -1,2 +1,7 @@
 from .pack import *
-from .arr import *
\ No newline at end of file
+from .arr import *
+from .bit_matrix import *
+from .transpose import *
+from .prefetch import *
+from .records import *
+from .aio import *
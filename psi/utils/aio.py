@@ -0,0 +1,31 @@
+import asyncio
+from concurrent.futures import Executor
+from functools import partial
+from typing import AsyncIterator, Callable, Iterable, Optional, TypeVar
+
+__all__ = ["run_in_executor", "iterate_in_executor"]
+
+T = TypeVar("T")
+
+_end = object()
+
+
+async def run_in_executor(executor: Optional[Executor], func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    call func in the executor, so the event loop keeps serving other sessions while func runs
+
+    :param executor: executor of func, the default executor of the running loop if it is None
+    """
+    return await asyncio.get_running_loop().run_in_executor(executor, partial(func, *args, **kwargs))
+
+
+async def iterate_in_executor(iterable: Iterable[T], executor: Optional[Executor] = None) -> AsyncIterator[T]:
+    """
+    iterate over iterable, every item is produced in the executor
+    """
+    iterator = iter(iterable)
+    while True:
+        item = await run_in_executor(executor, next, iterator, _end)
+        if item is _end:
+            break
+        yield item
@@ -0,0 +1,124 @@
+import secrets
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+
+from ..cipher.hash import sha256_rows
+from .transpose import transpose_bits
+from ..serialize import bit_matrix_to_bytes, bytes_to_bit_matrix
+
+__all__ = ["BitMatrix"]
+
+
+class BitMatrix(object):
+    """
+    2-d bit matrix with every row packed into bytes.
+    Row i is stored as bit_arr_to_bytes(arr[i, :]) without the length prefix,
+    so the bits are padded with zeros in the left to a multiple of 8.
+    """
+
+    _data: np.ndarray  # 2-d uint8 array, shape: rows * ((cols + 7) // 8)
+    _cols: int
+
+    def __init__(self, data: np.ndarray, cols: int):
+        if data.ndim != 2 or data.dtype != np.uint8:
+            raise ValueError("data should be a 2-d uint8 array")
+        if data.shape[1] != (cols + 7) // 8:
+            raise ValueError(f"data width {data.shape[1]} does not match cols {cols}")
+        self._data = data
+        self._cols = cols
+
+    @classmethod
+    def from_bit_arr(cls, arr: np.ndarray) -> "BitMatrix":
+        """
+        :param arr: 1-d or 2-d uint8 array of 0 and 1, 1-d array is treated as a matrix with one row
+        """
+        if arr.ndim == 1:
+            arr = arr.reshape((1, arr.size))
+        return cls(bit_matrix_to_bytes(arr), arr.shape[1])
+
+    @classmethod
+    def from_bytes(cls, rows: Sequence[bytes], cols: int) -> "BitMatrix":
+        """
+        :param rows: packed bytes of each row, without length prefix
+        """
+        width = (cols + 7) // 8
+        data = np.frombuffer(b"".join(rows), dtype=np.uint8).reshape((len(rows), width))
+        return cls(data, cols)
+
+    @classmethod
+    def rand(cls, rows: int, cols: int) -> "BitMatrix":
+        width = (cols + 7) // 8
+        data = np.frombuffer(secrets.token_bytes(rows * width), dtype=np.uint8).reshape((rows, width)).copy()
+        if cols % 8 != 0:
+            data[:, 0] &= (1 << (cols % 8)) - 1
+        return cls(data, cols)
+
+    @classmethod
+    def repeat(cls, bits: np.ndarray, cols: int) -> "BitMatrix":
+        """
+        :param bits: 1-d uint8 array of 0 and 1
+        :return: matrix with every bit in row i equal to bits[i]
+        """
+        ones = cls.from_bit_arr(np.ones(cols, dtype=np.uint8))._data
+        return cls(np.asarray(bits, dtype=np.uint8).reshape((-1, 1)) * ones, cols)
+
+    @property
+    def data(self) -> np.ndarray:
+        return self._data
+
+    @property
+    def rows(self) -> int:
+        return self._data.shape[0]
+
+    @property
+    def cols(self) -> int:
+        return self._cols
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.rows, self._cols
+
+    def to_bit_arr(self) -> np.ndarray:
+        return bytes_to_bit_matrix(self._data, self._cols)
+
+    def row_bytes(self, i: int) -> bytes:
+        return self._data[i].tobytes()
+
+    def hash_rows(self) -> np.ndarray:
+        """
+        :return: 2-d uint8 array, shape: rows * 32, row i is SHA256 digest of row_bytes(i)
+        """
+        return sha256_rows(self._data)
+
+    @property
+    def T(self) -> "BitMatrix":
+        return self.transpose()
+
+    def transpose(self) -> "BitMatrix":
+        return BitMatrix(transpose_bits(self._data, self._cols), self.rows)
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, item: Union[int, slice, np.ndarray]) -> "BitMatrix":
+        if isinstance(item, (int, np.integer)):
+            item = slice(item, item + 1 if item != -1 else None)
+        return BitMatrix(self._data[item], self._cols)
+
+    def _check_operand(self, other: "BitMatrix"):
+        if not isinstance(other, BitMatrix):
+            raise TypeError(f"unsupported operand type: {type(other)}")
+        if other._cols != self._cols:
+            raise ValueError(f"cols mismatch: {self._cols} and {other._cols}")
+
+    def __xor__(self, other: "BitMatrix") -> "BitMatrix":
+        self._check_operand(other)
+        return BitMatrix(self._data ^ other._data, self._cols)
+
+    def __and__(self, other: "BitMatrix") -> "BitMatrix":
+        """
+        other can be a matrix with one row, which is used as a mask for every row
+        """
+        self._check_operand(other)
+        return BitMatrix(self._data & other._data, self._cols)
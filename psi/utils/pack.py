@@ -1,8 +1,10 @@
-from typing import Tuple
+from typing import List, Sequence, Tuple
+
+import numpy as np
 
 from ..serialize import int_to_bytes, bytes_to_int
 
-__all__ = ["pack", "unpack"]
+__all__ = ["pack", "unpack", "pack_many", "unpack_many", "pack_list", "unpack_list"]
 
 
 def pack(m0: bytes, m1: bytes) -> bytes:
@@ -14,3 +16,45 @@ def unpack(m: bytes) -> Tuple[bytes, bytes]:
     m0 = m[4: 4 + m0_length]
     m1 = m[4 + m0_length:]
     return m0, m1
+
+
+def pack_many(m0s: Sequence[bytes], m1s: Sequence[bytes]) -> bytes:
+    """
+    pack many message pairs into one message:
+    count (4 bytes), lengths of all m0 and m1 (4 bytes each), all m0, all m1
+    """
+    if len(m0s) != len(m1s):
+        raise ValueError(f"m0 count {len(m0s)} is not equal to m1 count {len(m1s)}")
+    lengths = np.array([[len(m) for m in m0s], [len(m) for m in m1s]], dtype=">u4")
+    return b"".join([int_to_bytes(len(m0s)), lengths.tobytes(), *m0s, *m1s])
+
+
+def unpack_many(m: bytes) -> Tuple[List[bytes], List[bytes]]:
+    count = bytes_to_int(m[:4])
+    lengths = np.frombuffer(m, dtype=">u4", count=2 * count, offset=4).reshape((2, count))
+    offset = 4 + 8 * count
+    res = ([], [])
+    for i in range(2):
+        for n in lengths[i].tolist():
+            res[i].append(m[offset: offset + n])
+            offset += n
+    return res
+
+
+def pack_list(ms: Sequence[bytes]) -> bytes:
+    """
+    pack a list of messages into one message: count (4 bytes), lengths of all messages (4 bytes each), all messages
+    """
+    lengths = np.array([len(m) for m in ms], dtype=">u4")
+    return b"".join([int_to_bytes(len(ms)), lengths.tobytes(), *ms])
+
+
+def unpack_list(m: bytes) -> List[bytes]:
+    count = bytes_to_int(m[:4])
+    lengths = np.frombuffer(m, dtype=">u4", count=count, offset=4)
+    offset = 4 + 4 * count
+    res = []
+    for n in lengths.tolist():
+        res.append(m[offset: offset + n])
+        offset += n
+    return res
@@ -0,0 +1,58 @@
+import queue
+import threading
+from typing import Iterable, Iterator, NamedTuple, TypeVar
+
+__all__ = ["prefetch"]
+
+T = TypeVar("T")
+
+
+class _Error(NamedTuple):
+    error: BaseException
+
+
+_end = object()
+
+
+def prefetch(iterable: Iterable[T], size: int = 2) -> Iterator[T]:
+    """
+    iterate over iterable in a background thread, so producing the next items overlaps with consuming this one
+
+    :param size: max items produced but not consumed yet
+    """
+    items = queue.Queue(size)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        # give up if the consumer stopped, otherwise the producer would block forever on a full queue
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_Error(e))
+            return
+        put(_end)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _end:
+                break
+            if isinstance(item, _Error):
+                raise item.error
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
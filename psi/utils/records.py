@@ -0,0 +1,25 @@
+from typing import BinaryIO, Iterable, Iterator
+
+__all__ = ["binary_magic", "write_records", "read_records"]
+
+binary_magic = b"PSIB"  # binary files start with the magic and the record width as 4 bytes big endian integer
+
+
+def write_records(f: BinaryIO, records: Iterable[bytes]):
+    """
+    write records to a file, every record is prefixed with its length as 4 bytes big endian integer
+    """
+    for record in records:
+        f.write(len(record).to_bytes(4, "big"))
+        f.write(record)
+
+
+def read_records(f: BinaryIO) -> Iterator[bytes]:
+    """
+    read records written by write_records from the current position to the end of the file
+    """
+    while True:
+        header = f.read(4)
+        if not header:
+            break
+        yield f.read(int.from_bytes(header, "big"))
@@ -0,0 +1,68 @@
+import numpy as np
+
+__all__ = ["transpose_bits"]
+
+# delta swaps which transpose every 8 * 8 bit block stored in an uint64,
+# byte i (from the most significant one) is row i, bit j (from the most significant one) is column j
+_swaps = [
+    (np.uint64(7), np.uint64(0x00AA00AA00AA00AA)),
+    (np.uint64(14), np.uint64(0x0000CCCC0000CCCC)),
+    (np.uint64(28), np.uint64(0x00000000F0F0F0F0)),
+]
+
+_block_rows = 1 << 14  # rows transposed at once, keeps temporary arrays in cache
+
+
+def _transpose_blocks(x: np.ndarray):
+    for shift, mask in _swaps:
+        t = (x ^ (x >> shift)) & mask
+        x ^= t ^ (t << shift)
+
+
+def transpose_bits(data: np.ndarray, cols: int) -> np.ndarray:
+    """
+    transpose a bit matrix without unpacking it to one byte per bit
+
+    :param data: 2-d uint8 array, rows of the bit matrix packed into bytes with zero padding in the left
+    :param cols: column count of the bit matrix
+    :return: 2-d uint8 array, rows of the transposed bit matrix packed in the same way, shape: cols * ((rows + 7) // 8)
+    """
+    rows, width = data.shape
+    # pad rows in the top, so that the padding bits are in the left of transposed rows
+    row_pad = (8 - rows % 8) % 8
+    if row_pad > 0:
+        data = np.concatenate([np.zeros((row_pad, width), dtype=np.uint8), data])
+    rows8 = data.shape[0] // 8
+
+    res = np.empty((width * 8, rows8), dtype=np.uint8)
+    for start in range(0, rows8, _block_rows // 8):
+        stop = min(start + _block_rows // 8, rows8)
+        # gather 8 * 8 blocks: block (i, j) is bytes data[8i: 8i + 8, j]
+        blocks = data[start * 8: stop * 8].reshape((stop - start, 8, width)).transpose((0, 2, 1))
+        x = np.ascontiguousarray(blocks).view(">u8").astype(np.uint64)
+        _transpose_blocks(x)
+        # byte k of transposed block (i, j) is row 8j + k, byte column i of the result
+        out = x.astype(">u8").view(np.uint8).reshape((stop - start, width, 8))
+        res[:, start:stop] = out.transpose((1, 2, 0)).reshape((width * 8, stop - start))
+    # remove the rows coming from the left padding bits of columns
+    return res[width * 8 - cols:]
+
+
+if __name__ == '__main__':
+    import time
+
+    from ..serialize import bit_matrix_to_bytes, bytes_to_bit_matrix
+
+    for cols in [128, 512]:
+        rows = 10 ** 6
+        mat = np.random.randint(0, 256, size=(rows, cols // 8), dtype=np.uint8)
+
+        start = time.time()
+        transpose_bits(mat, cols)
+        packed_time = time.time() - start
+
+        start = time.time()
+        bit_matrix_to_bytes(np.ascontiguousarray(bytes_to_bit_matrix(mat, cols).T))
+        unpacked_time = time.time() - start
+
+        print(f"{rows} * {cols}: packed transpose {packed_time:.3f}s, unpacked transpose {unpacked_time:.3f}s")
@@ -0,0 +1,128 @@
+import heapq
+import logging
+import tempfile
+from typing import BinaryIO, Dict, List, Optional
+
+from .loader import item_to_str
+from .utils import binary_magic, write_records, read_records
+
+__all__ = ["ResultWriter"]
+
+_logger = logging.getLogger()
+
+
+class ResultWriter(object):
+    """
+    write intersection items to the result file as they are produced.
+    if the result is sorted, items are sorted in runs of bounded size in memory,
+    runs are spilled to temporary files and merged when the writer is closed.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        output_format: str = "text",
+        sort: bool = True,
+        data_format: str = "text",
+        id_width: Optional[int] = None,
+        rows: Optional[Dict[bytes, int]] = None,
+        run_size: int = 1 << 20,
+    ):
+        """
+        :param path: result file path
+        :param output_format: "text", one item per line formatted by loader.item_to_str,
+            "binary", fixed width records in the binary input format, or "index", input row index of every item per line
+        :param sort: sort items by their bytes, or rows by index in "index" format
+        :param data_format: input data format, see loader.load
+        :param id_width: input integer id width, see loader.load
+        :param rows: input row index of every item, required by "index" format
+        :param run_size: max items sorted in memory at once
+        """
+        if output_format not in ("text", "binary", "index"):
+            raise ValueError(f"unknown output format {output_format}, it should be text, binary or index")
+        if output_format == "index" and rows is None:
+            raise ValueError("input rows are required by index output format")
+        self._output_format = output_format
+        self._sort = sort
+        self._data_format = data_format
+        self._id_width = id_width
+        self._rows = rows
+        self._run_size = run_size
+
+        self._file = open(path, mode="wb")
+        self._width: Optional[int] = None  # record width of binary output, known after the first item
+        self._run: List[bytes] = []
+        self._run_files: List[BinaryIO] = []
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _record(self, item: bytes) -> Optional[bytes]:
+        """
+        sort key of the item, which is written as the item later
+
+        :return: None if the item has no input row in "index" format
+        """
+        if self._output_format == "index":
+            row = self._rows.get(item)
+            if row is None:
+                # a filter false positive or a misbehaving peer reports an item out of the local input
+                _logger.warning(f"matched item {item!r} is not in the input, it is skipped")
+                return None
+            # big endian rows sort as bytes in the same order as integers
+            return row.to_bytes(8, "big")
+        return item
+
+    def _emit(self, record: bytes):
+        if self._output_format == "binary":
+            if self._width is None:
+                self._width = len(record)
+                self._file.write(binary_magic + self._width.to_bytes(4, "big"))
+            elif len(record) != self._width:
+                raise ValueError(f"item length {len(record)} is not equal to record width {self._width}")
+            self._file.write(record)
+        elif self._output_format == "index":
+            self._file.write(b"%d\n" % int.from_bytes(record, "big"))
+        else:
+            self._file.write(item_to_str(record, self._data_format, self._id_width).encode("utf-8"))
+            self._file.write(b"\n")
+
+    def _spill(self):
+        self._run.sort()
+        f = tempfile.TemporaryFile()
+        write_records(f, self._run)
+        f.seek(0)
+        self._run_files.append(f)
+        self._run = []
+
+    def write(self, item: bytes):
+        record = self._record(item)
+        if record is None:
+            return
+        if not self._sort:
+            self._emit(record)
+            return
+        self._run.append(record)
+        if len(self._run) >= self._run_size:
+            self._spill()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if self._sort:
+                self._run.sort()
+                for record in heapq.merge(self._run, *[read_records(f) for f in self._run_files]):
+                    self._emit(record)
+            if self._output_format == "binary" and self._width is None:
+                # empty result
+                self._file.write(binary_magic + (0).to_bytes(4, "big"))
+        finally:
+            for f in self._run_files:
+                f.close()
+            self._file.close()
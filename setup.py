@@ -9,7 +9,7 @@ setup(
     include_package_data=True,
     exclude_package_data={'': ['.gitignore']},
     install_requires=[
-        'numpy~=1.20.2',
+        'numpy>=1.20.2',
         'pycryptodome~=3.10.1',
         "pyyaml~=5.3"
     ],
@@ -22,5 +22,5 @@ setup(
             "psi_run=psi.main:main"
         ]
     },
-    python_requires='>=3.6',
+    python_requires='>=3.9',
 )
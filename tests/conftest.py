@@ -0,0 +1,67 @@
+import socket
+import threading
+from typing import List, Tuple
+
+import pytest
+
+from psi.pair import Pair, make_pair, make_pairs
+
+
+def _free_ports(count: int) -> List[int]:
+    socks = []
+    for _ in range(count):
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        socks.append(sock)
+    ports = [sock.getsockname()[1] for sock in socks]
+    for sock in socks:
+        sock.close()
+    return ports
+
+
+@pytest.fixture
+def make_local_pair():
+    """
+    factory of two connected pairs in this process, the pairs are closed after the test
+    """
+    pairs = []
+
+    def factory(type: str = "socket") -> Tuple[Pair, Pair]:
+        port0, port1 = _free_ports(2)
+        res = {}
+        thread = threading.Thread(
+            target=lambda: res.setdefault(0, make_pair(("127.0.0.1", port0), ("127.0.0.1", port1), type=type))
+        )
+        thread.start()
+        res[1] = make_pair(("127.0.0.1", port1), ("127.0.0.1", port0), type=type)
+        thread.join()
+        pairs.extend([res[0], res[1]])
+        return res[0], res[1]
+
+    yield factory
+    for pair in pairs:
+        pair.close()
+
+
+@pytest.fixture
+def make_local_pairs():
+    """
+    factory of two lists of count pairs multiplexed over one connection, the pairs are closed after the test
+    """
+    pairs = []
+
+    def factory(count: int) -> Tuple[List[Pair], List[Pair]]:
+        port0, port1 = _free_ports(2)
+        res = {}
+        thread = threading.Thread(
+            target=lambda: res.setdefault(0, make_pairs(("127.0.0.1", port0), ("127.0.0.1", port1), count))
+        )
+        thread.start()
+        res[1] = make_pairs(("127.0.0.1", port1), ("127.0.0.1", port0), count)
+        thread.join()
+        pairs.extend(res[0] + res[1])
+        return res[0], res[1]
+
+    yield factory
+    for pair in pairs:
+        pair.close()
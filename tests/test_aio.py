@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from psi.pair import connect_pair, serve_pairs
+from psi.psi import AsyncClient, AsyncServer
+
+
+def _words(start: int, stop: int):
+    return [str(i).encode("utf-8") for i in range(start, stop)]
+
+
+async def _run_sessions(sessions: int, pipeline: bool):
+    server_results = asyncio.Queue()
+
+    async def serve(pair):
+        server = AsyncServer(pair, _words(0, 1000), pipeline=pipeline)
+        await server.prepare()
+        await server_results.put(await server.intersect())
+
+    async def run_client():
+        async with await connect_pair("127.0.0.1", port) as pair:
+            client = AsyncClient(pair, _words(500, 1500), pipeline=pipeline)
+            # the cuckoo table is built in prepare stage, in the executor
+            assert client.cuckoo is None
+            await client.prepare()
+            return await client.intersect()
+
+    listener = await serve_pairs(serve, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        results = await asyncio.gather(*[run_client() for _ in range(sessions)])
+        results.extend([await server_results.get() for _ in range(sessions)])
+    finally:
+        listener.close()
+        await listener.wait_closed()
+    return results
+
+
+@pytest.mark.parametrize("pipeline", [False, True])
+def test_async_sessions(pipeline):
+    results = asyncio.run(_run_sessions(3, pipeline))
+    assert all(sorted(res) == sorted(_words(500, 1000)) for res in results)
+
+
+def test_async_server_workers():
+    with pytest.raises(ValueError):
+        AsyncServer(None, [], workers=2)
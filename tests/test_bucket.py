@@ -0,0 +1,41 @@
+import threading
+
+from psi.psi.bucket import Buckets, BucketClient, BucketServer, bucket_capacity
+
+
+def _words(start: int, stop: int):
+    return [str(i).encode("utf-8") for i in range(start, stop)]
+
+
+def test_buckets_repeated_items(tmp_path):
+    # one heavily repeated item does not overflow its bucket
+    items = [b"repeated"] * 10000 + _words(0, 10000)
+    with Buckets([items[i: i + 1000] for i in range(0, len(items), 1000)], str(tmp_path)) as buckets:
+        assert buckets.size == 10001
+        capacity = bucket_capacity(buckets.size, 8)
+        loaded = [buckets.load(i, 8, capacity) for i in range(8)]
+    assert all(len(bucket) == capacity for bucket in loaded)
+    real = [item for bucket in loaded for item in bucket if item in set(items)]
+    assert sorted(real) == sorted(set(items))
+
+
+def test_bucket_psi_repeated_items(make_local_pair, tmp_path):
+    client_words = [b"repeated"] * 5000 + _words(0, 2000)
+    server_words = [b"repeated"] * 5000 + _words(1000, 3000)
+    server_pair, client_pair = make_local_pair()
+    # small memory, so the items are split into several buckets
+    server = BucketServer(server_pair, [server_words], 1 << 19, str(tmp_path))
+    client = BucketClient(client_pair, [client_words], 1 << 19, str(tmp_path))
+    server_res = []
+
+    def run_server():
+        server.prepare()
+        server_res.extend(server.intersect())
+
+    thread = threading.Thread(target=run_server)
+    thread.start()
+    client.prepare()
+    client_res = client.intersect()
+    thread.join()
+    assert client.count > 1
+    assert sorted(client_res) == sorted(server_res) == sorted(_words(1000, 2000) + [b"repeated"])
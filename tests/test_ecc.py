@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+from Crypto.PublicKey import ECC
+
+from psi.base import send_batch, recv_batch
+from psi.serialize import point_to_raw_bytes, raw_bytes_to_point, curve_name
+from psi.serialize.ecc import _curves, _sqrt_mod
+
+_nist_curves = ["P-256", "P-384", "P-521"]
+
+
+@pytest.mark.parametrize("curve", _nist_curves)
+def test_point_round_trip(curve):
+    for _ in range(20):
+        point = ECC.generate(curve=curve).pointQ
+        data = point_to_raw_bytes(point, curve)
+        assert len(data) == 1 + point.size_in_bytes()
+        assert raw_bytes_to_point(data, curve) == point
+        # the negative point differs only in the parity of y
+        assert raw_bytes_to_point(bytes([data[0] ^ 1]) + data[1:], curve) == -point
+
+
+@pytest.mark.parametrize("curve", _nist_curves)
+def test_invalid_point(curve):
+    data = point_to_raw_bytes(ECC.generate(curve=curve).pointQ, curve)
+    with pytest.raises(ValueError):
+        raw_bytes_to_point(b"\x04" + data[1:], curve)
+    # about half of x coordinates are not on the curve
+    invalid = 0
+    for i in range(1, 20):
+        try:
+            raw_bytes_to_point(data[:1] + i.to_bytes(len(data) - 1, "big"), curve)
+        except ValueError:
+            invalid += 1
+    assert invalid > 0
+
+
+@pytest.mark.parametrize("name", ["p-192", "p-224", "p-256", "p-384", "p-521"])
+def test_sqrt_mod(name):
+    # p = 1 (mod 4) for P-224, which needs Tonelli-Shanks
+    p = _curves[name].p
+    for a in range(2, 200):
+        root = _sqrt_mod(a * a % p, p)
+        assert root in (a, p - a)
+
+
+def test_curve_name():
+    assert curve_name("secp256r1") == curve_name("P-256") == curve_name("NIST P-256")
+    assert curve_name("secp384r1") != curve_name("secp256r1")
+    assert curve_name("Ed25519") == "ed25519"
+    with pytest.raises(ValueError):
+        curve_name("P-1")
+
+
+def _send_in_thread(pair, m0s, m1s, curve):
+    def run():
+        try:
+            send_batch(pair, m0s, m1s, curve)
+        except OSError:
+            # the receiver closes the pair if it refuses the curve
+            pass
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_base_ot_curve(make_local_pair):
+    m0s = [bytes([i]) * 16 for i in range(8)]
+    m1s = [bytes([i + 8]) * 16 for i in range(8)]
+    choices = [i % 2 for i in range(8)]
+
+    sender_pair, receiver_pair = make_local_pair()
+    thread = _send_in_thread(sender_pair, m0s, m1s, "P-384")
+    assert recv_batch(receiver_pair, choices, "secp384r1") == [(m0, m1)[b] for b, m0, m1 in zip(choices, m0s, m1s)]
+    thread.join()
+
+    # the receiver refuses a curve chosen by the sender
+    sender_pair, receiver_pair = make_local_pair()
+    thread = _send_in_thread(sender_pair, m0s, m1s, "P-384")
+    with pytest.raises(ValueError):
+        recv_batch(receiver_pair, choices, "P-256")
+    receiver_pair.close()
+    thread.join()
@@ -0,0 +1,82 @@
+import threading
+
+import numpy as np
+import pytest
+
+from psi.psi.filter import filter_types, make_filter, send_filter, recv_filter, _params_msg, _load_filter
+
+
+def _values(count: int, width: int, seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 256, size=(count, width), dtype=np.uint8)
+
+
+def _reload(f):
+    return _load_filter(f.name, _params_msg(f), f.data.reshape(-1, 1))
+
+
+@pytest.mark.parametrize("name", list(filter_types))
+@pytest.mark.parametrize("width", [8, 10, 16, 32])
+@pytest.mark.parametrize("count", [0, 1, 1000])
+def test_no_false_negative(name, width, count):
+    values = _values(count, width, 1)
+    f = make_filter(name, values, 2 ** -20)
+    assert _reload(f).contains(values).all()
+    assert not _reload(f).contains(_values(1000, width, 2)).any()
+
+
+@pytest.mark.parametrize("name", list(filter_types))
+def test_false_positive_rate(name):
+    fp_rate = 2 ** -6
+    f = make_filter(name, _values(5000, 16, 1), fp_rate)
+    queries = 50000
+    found = _reload(f).contains(_values(queries, 16, 2)).sum()
+    assert found < 2 * fp_rate * queries
+    assert f.data.size <= filter_types[name].byte_size(5000, fp_rate) * 1.1
+
+
+@pytest.mark.parametrize("name", list(filter_types))
+def test_duplicate_values(name):
+    values = _values(100, 16, 1)
+    f = make_filter(name, np.concatenate([values, values]), 2 ** -20)
+    assert _reload(f).contains(values).all()
+
+
+def test_golomb_coded_set_full_remainder():
+    # 64 bits remainders compare the second key exactly
+    values = _values(1000, 32, 1)
+    f = make_filter("gcs", values, 2 ** -64)
+    assert f.params[1] == 64
+    assert _reload(f).contains(values).all()
+    assert not _reload(f).contains(_values(1000, 32, 2)).any()
+    with pytest.raises(ValueError):
+        make_filter("gcs", values, 2 ** -65)
+
+
+def test_values_differ_after_8_bytes():
+    # keys are mixed from 16 bytes, so values with the same first 8 bytes are distinguished
+    values = np.zeros((1000, 16), dtype=np.uint8)
+    values[:, 8:10] = np.arange(1000, dtype=">u2").view(np.uint8).reshape(-1, 2)
+    queries = values.copy()
+    queries[:, 12] = 1
+    for name in filter_types:
+        f = make_filter(name, values, 2 ** -20)
+        assert f.contains(values).all()
+        assert not f.contains(queries).any()
+
+
+def test_unknown_filter():
+    with pytest.raises(ValueError):
+        make_filter("cuckoo", _values(10, 16, 1), 2 ** -20)
+    with pytest.raises(ValueError):
+        make_filter("bloom", _values(10, 16, 1), 0)
+
+
+def test_send_filter(make_local_pair):
+    values = _values(1000, 16, 1)
+    sender, receiver = make_local_pair()
+    for name in filter_types:
+        thread = threading.Thread(target=send_filter, args=(sender, make_filter(name, values, 2 ** -20)))
+        thread.start()
+        f = recv_filter(receiver, name)
+        thread.join()
+        assert f.contains(values).all()
@@ -0,0 +1,85 @@
+import random
+import socket
+
+import pytest
+
+from psi.pair.loop_socket.decoder import FrameDecoder
+from psi.pair.loop_socket.message import Message
+
+
+def _frames(messages):
+    return b"".join(msg.header() + bytes(msg.data) for msg in messages)
+
+
+def _random_messages(rng: random.Random, count: int):
+    messages = []
+    for _ in range(count):
+        length = rng.choice([0, 1, 3, rng.randrange(200), rng.randrange(1000)])
+        data = bytes(rng.getrandbits(8) for _ in range(length))
+        messages.append(Message(rng.randrange(1 << 20), data, rng.random() < 0.1))
+    return messages
+
+
+@pytest.fixture
+def sockets():
+    reader, writer = socket.socketpair()
+    reader.setblocking(False)
+    yield reader, writer
+    reader.close()
+    writer.close()
+
+
+def _decode_split(sockets, stream: bytes, rng: random.Random, decoder: FrameDecoder):
+    reader, writer = sockets
+    res = []
+    start = 0
+    while start < len(stream):
+        stop = min(start + rng.choice([1, 2, 5, rng.randrange(1, 300)]), len(stream))
+        writer.sendall(stream[start:stop])
+        start = stop
+        messages, closed = decoder.recv_from(reader)
+        assert not closed
+        res.extend(messages)
+    return res
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_random_split(sockets, seed):
+    rng = random.Random(seed)
+    messages = _random_messages(rng, 100)
+    # small buffers, so that large frames and frames across the end of the shared buffer are common
+    decoder = FrameDecoder(chunk_size=256 + 8, large_frame=256)
+    res = _decode_split(sockets, _frames(messages), rng, decoder)
+    assert [(msg.id, bytes(msg.data), msg.closed) for msg in res] == \
+           [(msg.id, msg.data, msg.closed) for msg in messages]
+
+
+def test_default_sizes(sockets):
+    rng = random.Random(1)
+    messages = [Message(1, bytes(range(256)) * 1024), Message(2, b"small"), Message(3, b"")]
+    res = _decode_split(sockets, _frames(messages), rng, FrameDecoder())
+    assert [(msg.id, bytes(msg.data)) for msg in res] == [(msg.id, msg.data) for msg in messages]
+    # data of a large frame is handed out without copying
+    assert isinstance(res[0].data, memoryview)
+
+
+def test_closed_connection(sockets):
+    reader, writer = sockets
+    decoder = FrameDecoder()
+    writer.sendall(_frames([Message(1, b"last")]))
+    writer.close()
+    messages, closed = decoder.recv_from(reader)
+    assert closed
+    assert [bytes(msg.data) for msg in messages] == [b"last"]
+
+
+def test_invalid_length(sockets):
+    reader, writer = sockets
+    writer.sendall(b"\x00\x00\x00\x02\x00\x00\x00\x01")
+    with pytest.raises(ValueError):
+        FrameDecoder().recv_from(reader)
+
+
+def test_invalid_sizes():
+    with pytest.raises(ValueError):
+        FrameDecoder(chunk_size=100, large_frame=100)
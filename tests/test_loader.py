@@ -0,0 +1,34 @@
+import pytest
+
+from psi.loader import load_input
+
+
+@pytest.fixture
+def input_path(tmp_path):
+    path = tmp_path / "input.txt"
+    path.write_text("b\na \nb\nc\n")
+    return str(path)
+
+
+def test_load_input(input_path):
+    res = load_input(input_path)
+    assert res.items == [b"b", b"a", b"c"]
+    assert res.chunks is None and res.rows is None
+    assert load_input(input_path, dedup=False).items == [b"b", b"a", b"b", b"c"]
+
+
+def test_load_input_index(input_path):
+    # repeated items are always dropped with index results, the first row is kept
+    res = load_input(input_path, dedup=False, result_format="index")
+    assert res.items == [b"b", b"a", b"c"]
+    assert res.rows == {b"b": 0, b"a": 1, b"c": 3}
+
+
+def test_load_input_bucketed(input_path):
+    res = load_input(input_path, bucketed=True)
+    assert res.items == [] and res.rows is None
+    assert [item for chunk in res.chunks for item in chunk] == [b"b", b"a", b"b", b"c"]
+    with pytest.raises(ValueError):
+        load_input(input_path, bucketed=True, shards=2)
+    with pytest.raises(ValueError):
+        load_input(input_path, bucketed=True, result_format="index")
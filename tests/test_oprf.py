@@ -0,0 +1,41 @@
+import threading
+
+import numpy as np
+import pytest
+from Crypto.Hash import SHAKE256
+
+from psi.oprf import Client, Server
+from psi.oprf.encode import encode
+from psi.serialize import bytes_to_bit_arr, int_to_bytes
+
+
+@pytest.mark.parametrize("codewords", [128, 130, 512])
+@pytest.mark.parametrize("count", [0, 1, 100])
+def test_encode(codewords, count):
+    words = [str(i).encode("utf-8") for i in range(count)]
+    res = encode(words, codewords)
+    assert res.shape == (count, codewords)
+    # the row by row encoding of the inputs
+    for i, word in enumerate(words):
+        row = bytes_to_bit_arr(int_to_bytes(codewords) + SHAKE256.new(word).read((codewords + 7) // 8))
+        assert np.array_equal(res[i].to_bit_arr()[0], row)
+
+
+@pytest.mark.parametrize("codewords", [128, 512])
+def test_oprf(make_local_pair, codewords):
+    words = [str(i).encode("utf-8") for i in range(100)]
+    server_pair, client_pair = make_local_pair()
+    server = Server(server_pair, codewords, output_length=16)
+    client = Client(client_pair, words, codewords, output_length=16)
+    thread = threading.Thread(target=server.prepare)
+    thread.start()
+    client.prepare()
+    thread.join()
+
+    client_vals = client.eval_all()
+    indices = np.arange(len(words))
+    assert np.array_equal(server.eval_batch(indices, words), client_vals)
+    assert server.eval(3, words[3]) == client.eval(3)
+    # other inputs of the same instances
+    other_vals = server.eval_batch(indices, [word + b"x" for word in words])
+    assert not (other_vals == client_vals).all(axis=1).any()
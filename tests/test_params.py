@@ -0,0 +1,53 @@
+import math
+
+from psi.psi.params import select_cuckoo_params, _stash_free_params, _stash_sizes, _stash_size
+
+_sizes = [1, 2, 100, 1 << 8, 1000, 1 << 12, 1 << 16, 1 << 20, (1 << 21) - 1, 1 << 21, 1 << 24, 1 << 26]
+_securities = [1, 20, 30, 40, 41, 64, 80, 128]
+
+
+def test_stash_size_monotone():
+    for sizes in _stash_sizes.values():
+        for stat_security in _securities:
+            stash_sizes = [_stash_size(sizes, n, stat_security) for n in _sizes]
+            assert stash_sizes == sorted(stash_sizes, reverse=True)
+        for n in _sizes:
+            stash_sizes = [_stash_size(sizes, n, stat_security) for stat_security in _securities]
+            assert stash_sizes == sorted(stash_sizes)
+
+
+def test_stash_size_of_table():
+    for sizes in _stash_sizes.values():
+        for log_size, size in zip((8, 12, 16, 20, 24), sizes):
+            assert _stash_size(sizes, 1 << log_size, 40) == size
+
+
+def _is_stash_free(n: int, stat_security: int) -> bool:
+    params = select_cuckoo_params(n, stat_security=stat_security)
+    return (params.hash_count, params.factor) == _stash_free_params
+
+
+def test_select_cuckoo_params_monotone():
+    for stat_security in _securities:
+        stash_free = [_is_stash_free(n, stat_security) for n in _sizes]
+        # once the table needs no stash, larger sets need none either
+        assert stash_free == sorted(stash_free)
+    for n in _sizes:
+        # a larger security parameter never selects cheaper parameters
+        costs = []
+        for stat_security in _securities:
+            params = select_cuckoo_params(n, stat_security=stat_security)
+            costs.append(params.table_size(n) + params.stash_size + (params.hash_count + params.stash_size) * n)
+        assert costs == sorted(costs)
+
+
+def test_select_cuckoo_params_security():
+    for n in _sizes:
+        for stat_security in _securities:
+            params = select_cuckoo_params(n, stat_security=stat_security)
+            key = (params.hash_count, params.factor)
+            if key in _stash_sizes:
+                assert params.stash_size == _stash_size(_stash_sizes[key], n, stat_security)
+            else:
+                assert params.stash_size == 0
+                assert 2 - 2 * math.log2(n) <= -stat_security
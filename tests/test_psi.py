@@ -0,0 +1,87 @@
+import logging
+import threading
+
+import pytest
+
+from psi.psi import Client, Server
+
+
+def _words(start: int, stop: int):
+    return [str(i).encode("utf-8") for i in range(start, stop)]
+
+
+def _run_psi(make_local_pair, client_words, server_words, pair_type="socket", client_kwargs=None, server_kwargs=None):
+    server_pair, client_pair = make_local_pair(pair_type)
+    server = Server(server_pair, server_words, **(server_kwargs or {}))
+    client = Client(client_pair, client_words, **(client_kwargs or {}))
+    server_res = []
+
+    def run_server():
+        server.prepare()
+        server_res.extend(server.intersect())
+
+    thread = threading.Thread(target=run_server)
+    thread.start()
+    client.prepare()
+    client_res = client.intersect()
+    thread.join()
+    return sorted(client_res), sorted(server_res)
+
+
+@pytest.mark.parametrize("pair_type", ["socket", "loop"])
+@pytest.mark.parametrize("pipeline", [False, True])
+def test_psi(make_local_pair, caplog, pair_type, pipeline):
+    # debug logging prints the oprf values of the client
+    caplog.set_level(logging.DEBUG)
+    expected = sorted(_words(500, 1000))
+    client_res, server_res = _run_psi(
+        make_local_pair, _words(500, 1500), _words(0, 1000), pair_type,
+        {"pipeline": pipeline}, {"pipeline": pipeline},
+    )
+    assert client_res == expected
+    assert server_res == expected
+
+
+@pytest.mark.parametrize("filter_type, fp_rate", [("gcs", None), ("bloom", 2 ** -20)])
+def test_psi_filter(make_local_pair, filter_type, fp_rate):
+    expected = sorted(_words(500, 1000))
+    client_res, server_res = _run_psi(
+        make_local_pair, _words(500, 1500), _words(0, 1000),
+        server_kwargs={"filter_type": filter_type, "fp_rate": fp_rate},
+    )
+    assert client_res == expected
+    assert server_res == expected
+
+
+def test_psi_workers(make_local_pair):
+    expected = sorted(_words(500, 1000))
+    client_res, server_res = _run_psi(
+        make_local_pair, _words(500, 1500), _words(0, 1000), server_kwargs={"workers": 2}
+    )
+    assert client_res == expected
+    assert server_res == expected
+
+
+def test_psi_disjoint(make_local_pair):
+    client_res, server_res = _run_psi(make_local_pair, _words(0, 100), _words(100, 300))
+    assert client_res == []
+    assert server_res == []
+
+
+@pytest.mark.parametrize("pipeline", [False, True])
+def test_psi_duplicate_server_words(make_local_pair, pipeline):
+    # every match is reported once, however many times the server has the word
+    server_words = _words(0, 100) * 3
+    client_res, server_res = _run_psi(
+        make_local_pair, _words(50, 150), server_words, client_kwargs={"pipeline": pipeline},
+        server_kwargs={"pipeline": pipeline},
+    )
+    assert client_res == sorted(_words(50, 100))
+    assert server_res == sorted(_words(50, 100))
+
+
+@pytest.mark.parametrize("output_length", [0, 33])
+def test_invalid_output_length(output_length):
+    # the client refuses the length before any message is sent
+    with pytest.raises(ValueError):
+        Client(None, _words(0, 10), output_length=output_length)
@@ -0,0 +1,32 @@
+import threading
+
+import pytest
+
+from psi.psi import ShardedClient, ShardedServer
+
+
+def _words(start: int, stop: int):
+    return [str(i).encode("utf-8") for i in range(start, stop)]
+
+
+def test_sharded_psi(make_local_pairs):
+    server_pairs, client_pairs = make_local_pairs(2)
+    server = ShardedServer(server_pairs, _words(0, 1000))
+    client = ShardedClient(client_pairs, _words(500, 1500))
+    server_res = []
+
+    def run_server():
+        server.prepare()
+        server_res.extend(server.intersect())
+
+    thread = threading.Thread(target=run_server)
+    thread.start()
+    client.prepare()
+    client_res = client.intersect()
+    thread.join()
+    assert sorted(client_res) == sorted(server_res) == sorted(_words(500, 1000))
+
+
+def test_sharded_server_workers():
+    with pytest.raises(ValueError):
+        ShardedServer([], [], workers=2)
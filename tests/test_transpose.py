@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from psi.serialize import bit_matrix_to_bytes, bytes_to_bit_matrix
+import psi.utils.transpose as transpose_module
+from psi.utils import BitMatrix, transpose_bits
+
+
+def _unpacked_transpose(data: np.ndarray, cols: int) -> np.ndarray:
+    return bit_matrix_to_bytes(np.ascontiguousarray(bytes_to_bit_matrix(data, cols).T))
+
+
+@pytest.mark.parametrize("rows", [1, 7, 8, 9, 64, 1000, 1003])
+@pytest.mark.parametrize("cols", [1, 5, 8, 13, 128, 130, 512])
+def test_transpose_bits(rows, cols):
+    data = BitMatrix.rand(rows, cols).data
+    res = transpose_bits(data, cols)
+    assert res.shape == (cols, (rows + 7) // 8)
+    assert np.array_equal(res, _unpacked_transpose(data, cols))
+    assert np.array_equal(transpose_bits(res, rows), data)
+
+
+def test_transpose_bits_many_blocks(monkeypatch):
+    # rows are transposed block by block, a small block makes the last block partial
+    monkeypatch.setattr(transpose_module, "_block_rows", 64)
+    data = BitMatrix.rand(1001, 136).data
+    assert np.array_equal(transpose_bits(data, 136), _unpacked_transpose(data, 136))
+
+
+def test_bit_matrix_transpose():
+    mat = BitMatrix.rand(300, 77)
+    assert np.array_equal(mat.T.to_bit_arr(), mat.to_bit_arr().T)
+    assert np.array_equal(mat.T.T.data, mat.data)
@@ -0,0 +1,23 @@
+import logging
+
+from psi.writer import ResultWriter
+
+
+def test_index_unknown_item(tmp_path, caplog):
+    path = str(tmp_path / "result.txt")
+    rows = {b"a": 0, b"b": 5, b"c": 2}
+    with ResultWriter(path, output_format="index", rows=rows) as writer:
+        for item in [b"b", b"x", b"a"]:
+            writer.write(item)
+    with open(path) as f:
+        assert f.read() == "0\n5\n"
+    assert any("b'x'" in record.getMessage() for record in caplog.records if record.levelno == logging.WARNING)
+
+
+def test_text_result(tmp_path):
+    path = str(tmp_path / "result.txt")
+    with ResultWriter(path, run_size=2) as writer:
+        for item in [b"c", b"a", b"d", b"b"]:
+            writer.write(item)
+    with open(path) as f:
+        assert f.read() == "a\nb\nc\nd\n"